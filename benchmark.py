@@ -0,0 +1,366 @@
+import datetime
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+from generate import format_title, get_log_path, get_today
+
+GENERATE_SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "generate.py"
+)
+COMMANDS = ("dashboard", "log", "history", "database", "all")
+FOOD_DATABASE = os.path.join(
+    os.path.dirname(GENERATE_SCRIPT), "data", "food_database.json"
+)
+FORMAT_TITLE_ROUNDS = 4
+
+BRANDS = [
+    "Fairlife",
+    "Quest",
+    "Kirkland Signature",
+    "Trader Joe's",
+    "CookUnity",
+    "Chobani",
+    "Oikos",
+    "Premier Protein",
+    "Lay's",
+    "Barebells",
+    "Safe Catch",
+    "Siggi's",
+]
+PRODUCTS = [
+    "Protein Shake",
+    "Greek Yogurt",
+    "Chicken Breast",
+    "Protein Bar",
+    "Potato Chips",
+    "Tuna",
+    "Meatballs with Tomato Sauce",
+    "Turkey Breast Dinner",
+    "Egg Bites",
+    "Cottage Cheese",
+    "Beef Jerky",
+    "Burrito Bowl",
+]
+FLAVORS = [
+    "",
+    "Vanilla",
+    "Chocolate",
+    "Cookies and Cream",
+    "Sea Salt",
+    "BBQ",
+    "Strawberry",
+    "Peanut Butter",
+]
+INGREDIENTS = [
+    "Water",
+    "Milk Protein Concentrate",
+    "Salt",
+    "Sugar",
+    "Natural Flavor",
+    "Cocoa",
+    "Chicken",
+    "Potatoes",
+    "Vegetable Oil",
+    "Whey",
+    "Sucralose",
+    "Citric Acid",
+]
+
+
+def slugify(text: str) -> str:
+    return "_".join("".join(c if c.isalnum() else " " for c in text.lower()).split())
+
+
+def synthesize_dataset(
+    directory: str,
+    foods: int,
+    inventory_items: int,
+    years: int,
+    end_date: datetime.date,
+    seed: int,
+) -> dict:
+    """Writes data/ and sharded logs/ with the same shape as the real files."""
+    generator = random.Random(seed)
+    database = {}
+    for index in range(foods):
+        brand = generator.choice(BRANDS)
+        product = generator.choice(PRODUCTS)
+        flavor = generator.choice(FLAVORS)
+        protein = generator.randint(0, 60)
+        carbohydrate = generator.randint(0, 80)
+        fat = round(generator.uniform(0, 40), 1)
+        database[f"{slugify(brand)}_{slugify(product)}_{slugify(flavor)}_{index}"] = {
+            "brand": brand,
+            "product_name": product,
+            "flavor": flavor,
+            "calories_kcal": round(protein * 4 + carbohydrate * 4 + fat * 9),
+            "protein_g": protein,
+            "carbohydrate_g": carbohydrate,
+            "fat_g": fat,
+            "sodium_mg": generator.randint(0, 1200),
+            "dietary_fiber_g": generator.randint(0, 12),
+            "total_sugars_g": generator.randint(0, 30),
+            "serving_size": generator.randint(20, 400),
+            "serving_unit": "g",
+            "ingredients": generator.sample(INGREDIENTS, generator.randint(2, 8)),
+        }
+    food_ids = list(database)
+
+    os.makedirs(os.path.join(directory, "data"), exist_ok=True)
+    with open(os.path.join(directory, "data", "food_database.json"), "w") as file:
+        json.dump(database, file, indent=2)
+    with open(os.path.join(directory, "data", "goals.json"), "w") as file:
+        json.dump(
+            {
+                "phase": "cut",
+                "calories_target": 1800,
+                "calories_maintenance": 2300,
+                "protein_g": 180,
+                "carbohydrate_g": 0,
+                "fat_g": 0,
+            },
+            file,
+            indent=2,
+        )
+    with open(os.path.join(directory, "data", "inventory.json"), "w") as file:
+        json.dump(
+            [
+                {"id": food_id, "quantity": generator.randint(1, 12), "unit": "item"}
+                for food_id in generator.sample(food_ids, min(inventory_items, foods))
+            ],
+            file,
+            indent=2,
+        )
+
+    days = years * 365
+    for offset in range(days):
+        date_str = (end_date - datetime.timedelta(days=offset)).isoformat()
+        entries = []
+        for food_id in generator.sample(food_ids, min(generator.randint(3, 8), foods)):
+            food = database[food_id]
+            entries.append(
+                {
+                    "id": food_id,
+                    "display_name": f"{food['brand']} - {food['product_name']}",
+                    "amount": 1,
+                    "calories_kcal": food["calories_kcal"],
+                    "protein_g": food["protein_g"],
+                    "carbohydrate_g": food["carbohydrate_g"],
+                    "fat_g": food["fat_g"],
+                }
+            )
+        totals = {
+            field: round(sum(entry[field] for entry in entries), 2)
+            for field in ("calories_kcal", "protein_g", "carbohydrate_g", "fat_g")
+        }
+        log_path = get_log_path(
+            os.path.join(directory, "logs"), date_str, create_dirs=True
+        )
+        with open(log_path, "w") as file:
+            json.dump({"entries": entries, "totals": totals}, file, indent=2)
+    return {"foods": foods, "inventory_items": inventory_items, "days": days}
+
+
+def get_directory_size(directory: str) -> int:
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def run_command(
+    directory: str, command: str, end_date: datetime.date, cold: bool = True
+) -> dict:
+    """Runs one command; a cold run first drops the shared .cache/ directory."""
+    output_directory = os.path.join(directory, f"out-{command}")
+    # The build manifest lives in the output directory, so this also forgets it
+    shutil.rmtree(output_directory, ignore_errors=True)
+    if cold:
+        shutil.rmtree(os.path.join(directory, ".cache"), ignore_errors=True)
+    os.makedirs(output_directory)
+    arguments = [sys.executable, GENERATE_SCRIPT, command]
+    if command == "log":
+        arguments += ["--date", end_date.isoformat()]
+    arguments += ["--output-directory", output_directory]
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        arguments,
+        cwd=directory,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    stderr = process.stderr.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    wall_seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise click.ClickException(
+            f"{command} failed with exit code {process.returncode}:\n"
+            f"{stderr.decode(errors='replace')}"
+        )
+    return {
+        "command": command,
+        "cache": "cold" if cold else "warm",
+        "wall_seconds": round(wall_seconds, 4),
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_memory_kb": usage.ru_maxrss,
+        "output_bytes": get_directory_size(output_directory),
+    }
+
+
+def time_format_title(database_path: str, rounds: int) -> dict:
+    """Title-cases every product_name and flavor, without and with the LRU cache."""
+    with open(database_path) as file:
+        database = json.load(file)
+    texts = [
+        food.get(field) or ""
+        for food in database.values()
+        for field in ("product_name", "flavor")
+    ] * rounds
+    timings = {"calls": len(texts)}
+    for label, function in (
+        ("uncached", format_title.__wrapped__),
+        ("cached", format_title),
+    ):
+        format_title.cache_clear()
+        start = time.perf_counter()
+        for text in texts:
+            function(text)
+        timings[f"{label}_seconds"] = round(time.perf_counter() - start, 6)
+    return timings
+
+
+def get_git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(GENERATE_SCRIPT),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+@click.command()
+@click.option("--foods", default=10000, show_default=True, help="Foods in the database")
+@click.option(
+    "--inventory-items", default=200, show_default=True, help="Inventory items"
+)
+@click.option("--years", default=1, show_default=True, help="Years of daily logs")
+@click.option(
+    "--command",
+    "commands",
+    multiple=True,
+    type=click.Choice(COMMANDS),
+    help="Command to time (repeatable, defaults to all of them)",
+)
+@click.option("--repeat", default=1, show_default=True, help="Runs per command")
+@click.option(
+    "--warm",
+    is_flag=True,
+    help="Also time a warm run, reusing .cache/, after each cold run",
+)
+@click.option("--seed", default=0, show_default=True, help="Random seed")
+@click.option(
+    "--workdir",
+    default=None,
+    help="Keep the synthetic dataset in this directory instead of a temp directory",
+)
+@click.option(
+    "--format-title",
+    "format_title_only",
+    is_flag=True,
+    help="Only time format_title over data/food_database.json, uncached and cached",
+)
+@click.option(
+    "--results",
+    default="benchmark_results.json",
+    show_default=True,
+    help="Where to write the JSON results",
+)
+def benchmark(
+    foods: int,
+    inventory_items: int,
+    years: int,
+    commands: tuple,
+    repeat: int,
+    warm: bool,
+    seed: int,
+    workdir: str,
+    format_title_only: bool,
+    results: str,
+):
+    """Times generate.py commands against synthetic years of data."""
+    if format_title_only:
+        timings = time_format_title(FOOD_DATABASE, FORMAT_TITLE_ROUNDS)
+        click.echo(
+            f"format_title x{timings['calls']}: "
+            f"uncached {timings['uncached_seconds'] * 1000:.1f} ms, "
+            f"cached {timings['cached_seconds'] * 1000:.1f} ms"
+        )
+        with open(results, "w") as results_file:
+            json.dump(
+                {
+                    "revision": get_git_revision(),
+                    "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "python": sys.version.split()[0],
+                    "format_title": timings,
+                },
+                results_file,
+                indent=2,
+            )
+        click.echo(f"Results: {results}")
+        return
+    end_date = datetime.date.fromisoformat(get_today())
+    with tempfile.TemporaryDirectory(prefix="dfl-benchmark-") as temporary_directory:
+        directory = workdir or temporary_directory
+        os.makedirs(directory, exist_ok=True)
+        click.echo(
+            f"Synthesizing {foods} foods, {inventory_items} inventory items "
+            f"and {years} year(s) of logs in {directory}"
+        )
+        dataset = synthesize_dataset(
+            directory, foods, inventory_items, years, end_date, seed
+        )
+        runs = []
+        for command in commands or COMMANDS:
+            for _ in range(repeat):
+                for cold in (True, False) if warm else (True,):
+                    run = run_command(directory, command, end_date, cold)
+                    click.echo(
+                        f"{command:<10} {run['cache']:<5} "
+                        f"{run['wall_seconds']:>9.3f}s "
+                        f"{run['peak_memory_kb'] / 1024:>9.1f} MB "
+                        f"{run['output_bytes']:>12} bytes"
+                    )
+                    runs.append(run)
+
+    with open(results, "w") as results_file:
+        json.dump(
+            {
+                "revision": get_git_revision(),
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "dataset": dict(dataset, seed=seed),
+                "runs": runs,
+            },
+            results_file,
+            indent=2,
+        )
+    click.echo(f"Results: {results}")
+
+
+if __name__ == "__main__":
+    benchmark()
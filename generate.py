@@ -1,82 +1,116 @@
+import array
+import bisect
+import contextlib
+import cProfile
 import datetime
+import errno
+import functools
 import glob
+import hashlib
 import html
+import http.server
+import io
+import itertools
 import json
 import os
 import re
 import shutil
+import sqlite3
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator
 
 import click
 
-
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    from PIL import Image, features
+except ImportError:  # Images are then staged unchanged
+    Image = features = None
+
+try:
+    import orjson
+except ImportError:  # The stdlib parser is used instead
+    orjson = None
+
+
+TITLE_LOWER_WORDS = {
+    "a",
+    "an",
+    "the",
+    "and",
+    "but",
+    "for",
+    "or",
+    "nor",
+    "so",
+    "yet",
+    "as",
+    "at",
+    "by",
+    "in",
+    "of",
+    "on",
+    "to",
+    "up",
+    "with",
+    "from",
+    "into",
+    "onto",
+    "upon",
+    "via",
+    "mid",
+}
+TITLE_UPPER_ACRONYMS = {
+    "bbq",
+    "blt",
+    "usda",
+    "gmo",
+    "msg",
+    "pb&j",
+    "bpa",
+    "id",
+    "p/c/f",
+    "usa",
+}
+TITLE_UNITS = {"oz", "fl", "ml", "g", "mg", "kcal"}
+TITLE_SPECIAL_CASES = {"kitkat": "KitKat"}
+TITLE_EDGE_PUNCTUATION = re.compile(r"^[^a-zA-Z0-9]+|[^a-zA-Z0-9]+$")
+
+
+@functools.lru_cache(maxsize=4096)
 def format_title(text: str) -> str:
     if not text:
         return ""
-    lower_words = {
-        "a",
-        "an",
-        "the",
-        "and",
-        "but",
-        "for",
-        "or",
-        "nor",
-        "so",
-        "yet",
-        "as",
-        "at",
-        "by",
-        "in",
-        "of",
-        "on",
-        "to",
-        "up",
-        "with",
-        "from",
-        "into",
-        "onto",
-        "upon",
-        "via",
-        "mid",
-    }
-    upper_acronyms = {
-        "bbq",
-        "blt",
-        "usda",
-        "gmo",
-        "msg",
-        "pb&j",
-        "bpa",
-        "id",
-        "p/c/f",
-        "usa",
-    }
-    units = {"oz", "fl", "ml", "g", "mg", "kcal"}
-    special_cases = {"kitkat": "KitKat"}
     words = str(text).split()
     if not words:
         return ""
     formatted_words = []
     for index, word in enumerate(words):
-        stripped = re.sub(r"^[^a-zA-Z0-9]+|[^a-zA-Z0-9]+$", "", word)
+        stripped = TITLE_EDGE_PUNCTUATION.sub("", word)
         clean = stripped.lower()
         if "-" in stripped:
             parts = stripped.split("-")
             formatted_parts = [
-                special_cases.get(part.lower(), part.capitalize()) for part in parts
+                TITLE_SPECIAL_CASES.get(part.lower(), part.capitalize())
+                for part in parts
             ]
             formatted_main = "-".join(formatted_parts)
             result = word.replace(stripped, formatted_main)
-        elif clean in special_cases:
-            result = word.replace(stripped, special_cases[clean])
-        elif clean in upper_acronyms:
+        elif clean in TITLE_SPECIAL_CASES:
+            result = word.replace(stripped, TITLE_SPECIAL_CASES[clean])
+        elif clean in TITLE_UPPER_ACRONYMS:
             result = word.replace(stripped, stripped.upper())
-        elif clean in units:
+        elif clean in TITLE_UNITS:
             result = word.replace(stripped, clean)
         elif index == 0 or index == len(words) - 1:
             result = word.replace(stripped, stripped.capitalize())
-        elif clean in lower_words:
+        elif clean in TITLE_LOWER_WORDS:
             result = word.replace(stripped, clean)
         else:
             result = word.replace(stripped, stripped.capitalize())
@@ -84,62 +118,380 @@ def format_title(text: str) -> str:
     return " ".join(formatted_words)
 
 
-def get_shared_head(title: str) -> str:
+SITE_CSS = """\
+:root {
+    --primary: #2563eb; --bg: #f8fafc; --card: #ffffff; --text: #1e293b;
+    --success: #10b981; --warning: #f59e0b; --danger: #ef4444; --muted: #64748b; --border: #e2e8f0;
+}
+body.dark-mode {
+    --bg: #0f172a; --card: #1e293b; --text: #f8fafc; --muted: #94a3b8; --border: #334155;
+}
+body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; background: var(--bg); color: var(--text); line-height: 1.5; margin: 0; padding: 2rem; transition: background 0.3s, color 0.3s; }
+.container { max-width: 1200px; margin: 0 auto; }
+header { margin-bottom: 2rem; display: flex; justify-content: space-between; align-items: center; }
+h1, h2 { color: var(--text); margin: 0; }
+h2 { margin-top: 2rem; margin-bottom: 1rem; }
+.nav-link { color: var(--primary); text-decoration: none; font-weight: 600; font-size: 0.875rem; }
+.nav-link:hover { text-decoration: underline; }
+
+.theme-toggle {
+    background: none; border: 1px solid var(--border); padding: 0.5rem; border-radius: 8px; cursor: pointer; color: var(--muted);
+    display: flex; align-items: center; justify-content: center; transition: all 0.2s;
+}
+.theme-toggle:hover { background: var(--border); color: var(--primary); }
+.theme-toggle svg { width: 18px; height: 18px; }
+.sun-icon { display: none; }
+.dark-mode .sun-icon { display: block; }
+.dark-mode .moon-icon { display: none; }
+
+table { width: 100%; border-collapse: collapse; background: var(--card); border-radius: 12px; overflow: hidden; box-shadow: 0 1px 3px rgba(0,0,0,0.1); transition: background 0.3s; border: 1px solid var(--border); }
+th, td { padding: 1rem; text-align: left; border-bottom: 1px solid var(--border); }
+th { background: #f1f5f9; font-weight: 600; font-size: 0.875rem; color: #475569; }
+body.dark-mode th { background: #1e293b; color: #cbd5e1; border-bottom: 2px solid var(--primary); }
+.text-center { text-align: center; }
+.badge { display: inline-block; padding: 0.25rem 0.5rem; border-radius: 4px; font-size: 0.75rem; font-weight: 600; background: #f1f5f9; color: #475569; }
+body.dark-mode .badge { background: var(--bg); color: var(--muted); }
+.tag-modified { display: inline-block; padding: 0.15rem 0.4rem; border-radius: 4px; font-size: 0.65rem; font-weight: 700; text-transform: uppercase; background: #f0f9ff; color: #0369a1; margin-left: 0.5rem; vertical-align: middle; border: 1px solid #e0f2fe; }
+.dark-mode .tag-modified { background: #0c4a6e; color: #7dd3fc; border-color: #0ea5e9; }
+.tag-flavor { display: inline-block; padding: 0.15rem 0.4rem; border-radius: 4px; font-size: 0.65rem; font-weight: 700; text-transform: uppercase; background: #f8fafc; color: #475569; margin-left: 0.5rem; vertical-align: middle; border: 1px solid #e2e8f0; }
+.dark-mode .tag-flavor { background: #334155; color: #cbd5e1; border-color: #475569; }
+.trends { margin-bottom: 2rem; }
+.trend-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1.5rem; }
+.trend-card { background: var(--card); padding: 1.25rem; border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); transition: background 0.3s; }
+.trend-label { font-size: 0.7rem; color: var(--muted); text-transform: uppercase; letter-spacing: 0.05em; font-weight: 700; }
+.trend-value { font-size: 1.5rem; font-weight: 800; color: var(--text); }
+.trend-detail { font-size: 0.8rem; color: var(--muted); }
+"""
+
+THEME_SCRIPT = """\
+if (localStorage.getItem('theme') === 'dark') {
+    document.documentElement.classList.add('dark-mode');
+    document.addEventListener('DOMContentLoaded', () => {
+        document.body.classList.add('dark-mode');
+    });
+}
+function toggleTheme() {
+    const isDark = document.body.classList.toggle('dark-mode');
+    document.documentElement.classList.toggle('dark-mode', isDark);
+    localStorage.setItem('theme', isDark ? 'dark' : 'light');
+}
+// Only over HTTPS, so file:// previews and the local preview server stay uncached
+if ('serviceWorker' in navigator && location.protocol === 'https:') {
+    navigator.serviceWorker
+        .register(new URL('../service-worker.js', document.currentScript.src))
+        .catch(() => {});
+}
+"""
+
+DASHBOARD_CSS = """\
+.grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1.5rem; margin-bottom: 2rem; }
+.card { background: var(--card); padding: 1.25rem; border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); display: flex; flex-direction: column; gap: 0.1rem; transition: background 0.3s; }
+.stat-label { font-size: 0.7rem; color: var(--muted); text-transform: uppercase; letter-spacing: 0.05em; font-weight: 700; display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.2rem; }
+.stat-val { font-size: 1.75rem; font-weight: 800; color: var(--text); line-height: 1.1; }
+.goal-display-container { color: var(--muted); font-weight: 700; font-size: 1.1rem; display: flex; align-items: center; margin: 0.4rem 0; min-height: 1.5rem; }
+.progress-bg { background: var(--border); height: 6px; border-radius: 3px; overflow: hidden; margin-top: 0.2rem; }
+.progress-fill { background: var(--primary); height: 100%; transition: width 0.3s ease, background 0.3s ease; }
+.tooltip { visibility: hidden; width: 130px; background-color: #1e293b; color: #fff; text-align: left; border-radius: 6px; padding: 8px 10px; position: absolute; z-index: 10; bottom: 140%; right: 0; opacity: 0; transition: opacity 0.2s; font-size: 0.7rem; text-transform: none; box-shadow: 0 10px 15px -3px rgba(0,0,0,0.1); pointer-events: none; }
+.info-icon:hover .tooltip { visibility: visible; opacity: 1; }
+input[type=number]::-webkit-inner-spin-button { -webkit-appearance: none; margin: 0; }
+.editable-goal { border: 1px solid transparent; background: transparent; color: inherit; font: inherit; width: 100%; padding: 0; margin: 0; text-align: left; cursor: pointer; }
+.editable-goal:hover { color: var(--primary); }
+.editable-goal:focus { border-bottom: 1px solid var(--primary); outline: none; cursor: text; color: var(--text); }
+tr.selected { background: #bfdbfe !important; }
+body.dark-mode tr.selected { background: #1e40af !important; }
+"""
+
+DASHBOARD_SCRIPT = """\
+function toggleProjection(row) {
+    row.classList.toggle('selected');
+    updateProjection();
+}
+
+function updateProjection() {
+    const goals = {
+        target: parseFloat(document.getElementById('goal-calories-input').value) || 0,
+        protein: parseFloat(document.getElementById('goal-protein-input').value) || 0,
+        carbohydrate: parseFloat(document.getElementById('goal-carbohydrate-input').value) || 0,
+        fat: parseFloat(document.getElementById('goal-fat-input').value) || 0
+    };
+    let projectedCalories = 0, projectedProtein = 0, projectedCarbohydrate = 0, projectedFat = 0;
+    document.querySelectorAll('.inventory-row.selected, .plan-row.selected').forEach(row => {
+        projectedCalories += parseFloat(row.dataset.calories);
+        projectedProtein += parseFloat(row.dataset.protein);
+        projectedCarbohydrate += parseFloat(row.dataset.carbohydrate);
+        projectedFat += parseFloat(row.dataset.fat);
+    });
+    updateCardCalories(currentTotals.calories + projectedCalories, projectedCalories, goals.target, maintenanceCalories);
+    updateCardMacro('protein', currentTotals.protein + projectedProtein, projectedProtein, goals.protein, 'g', false);
+    updateCardMacro('carbohydrate', currentTotals.carbohydrate + projectedCarbohydrate, projectedCarbohydrate, goals.carbohydrate, 'g', true);
+    updateCardMacro('fat', currentTotals.fat + projectedFat, projectedFat, goals.fat, 'g', true);
+}
+
+function updateCardCalories(total, projected, target, maintenance) {
+    const card = document.getElementById('card-calories');
+    const span = card.querySelector('.current');
+    const fill = card.querySelector('.progress-fill');
+    const mode = document.getElementById('goal-calories-input').dataset.mode;
+    const midpoint = (target + maintenance) / 2;
+
+    span.textContent = total;
+    let color = '';
+
+    if (mode === 'bulk') {
+        if (total < maintenance) color = 'var(--danger)';
+        else if (total < midpoint) color = 'var(--warning)';
+        else if (total < target) color = 'var(--text)';
+        else if (projected > 0) color = 'var(--primary)';
+        else color = 'var(--success)';
+    } else {
+        if (total > maintenance) color = 'var(--danger)';
+        else if (total > midpoint) color = 'var(--warning)';
+        else if (total > target) color = 'var(--text)';
+        else if (projected > 0) color = 'var(--primary)';
+        else color = 'var(--success)';
+    }
+
+    span.style.color = color;
+    fill.style.background = color || 'var(--primary)';
+    fill.style.width = target > 0 ? Math.min(100, Math.round((total / target) * 100)) + '%' : '0%';
+}
+
+function updateCardMacro(id, total, projected, goal, unit, strict) {
+    const card = document.getElementById('card-' + id);
+    const span = card.querySelector('.current');
+    const fill = card.querySelector('.progress-fill');
+    span.textContent = total + unit;
+    let color = '';
+    if (goal > 0) {
+        if (strict && total > goal) color = 'var(--danger)';
+        else if (total >= goal) color = 'var(--success)';
+        else if (projected > 0) color = 'var(--primary)';
+    } else if (projected > 0) {
+        color = 'var(--primary)';
+    }
+    span.style.color = color;
+    fill.style.background = color || 'var(--primary)';
+    fill.style.width = goal > 0 ? Math.min(100, Math.round((total / goal) * 100)) + '%' : '0%';
+}
+updateProjection();
+"""
+
+DATABASE_CSS = """\
+.controls { background: var(--card); padding: 1.25rem; border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); margin-bottom: 2rem; display: grid; grid-template-columns: 2fr 1fr 1fr; gap: 1.5rem; align-items: end; transition: background 0.3s; }
+.control-group { display: flex; flex-direction: column; gap: 0.5rem; }
+.control-group label { font-size: 0.75rem; font-weight: 700; color: var(--muted); text-transform: uppercase; letter-spacing: 0.05em; }
+input, select { padding: 0.6rem; border: 1px solid var(--border); border-radius: 6px; font-size: 0.875rem; color: var(--text); background: var(--card); outline: none; transition: border-color 0.2s, background 0.3s; }
+input:focus, select:focus { border-color: var(--primary); }
+.empty-state { padding: 4rem; text-align: center; color: var(--muted); display: none; }
+"""
+
+DATABASE_SCRIPT = """\
+const foodData = JSON.parse(document.getElementById('food-data').textContent);
+const rowCount = foodData.product.length;
+const columns = ['brand', 'product', 'calories', 'protein', 'carbohydrate', 'fat'];
+const pageSize = 100;
+let matches = [];
+let rendered = 0;
+
+function findTokenStart(prefix) {
+    let low = 0, high = foodData.tokens.length;
+    while (low < high) {
+        const middle = (low + high) >> 1;
+        if (foodData.tokens[middle] < prefix) low = middle + 1;
+        else high = middle;
+    }
+    return low;
+}
+function matchTerm(term) {
+    const rows = new Set();
+    for (let index = findTokenStart(term); index < foodData.tokens.length && foodData.tokens[index].startsWith(term); index++) {
+        foodData.postings[index].forEach(row => rows.add(row));
+    }
+    return rows;
+}
+function filterTable() {
+    const terms = document.getElementById('search').value.toLowerCase().match(/[a-z0-9]+/g) || [];
+    const brand_filter = document.getElementById('brand-filter').value;
+    let candidates = null;
+    for (const term of terms) {
+        const rows = matchTerm(term);
+        candidates = candidates === null ? Array.from(rows) : candidates.filter(row => rows.has(row));
+        if (candidates.length === 0) break;
+    }
+    if (candidates === null) candidates = Array.from({ length: rowCount }, (_, row) => row);
+    matches = brand_filter === "" ? candidates : candidates.filter(row => foodData.brand[row] === parseInt(brand_filter));
+    sortTable();
+}
+function sortTable() {
+    const column = columns[parseInt(document.getElementById('sort-by').value)];
+    if (column === 'brand') {
+        matches.sort((a, b) => foodData.brands[foodData.brand[a]].localeCompare(foodData.brands[foodData.brand[b]]) || a - b);
+    } else if (column === 'product') {
+        matches.sort((a, b) => foodData.product[a].localeCompare(foodData.product[b]) || a - b);
+    } else {
+        const values = foodData[column];
+        matches.sort((a, b) => values[b] - values[a] || a - b);
+    }
+    const tbody = document.querySelector('#food-table tbody');
+    tbody.replaceChildren();
+    rendered = 0;
+    renderMore();
+    document.getElementById('empty-state').style.display = matches.length === 0 ? 'block' : 'none';
+}
+function createCell(text, className) {
+    const cell = document.createElement('td');
+    if (className) cell.className = className;
+    cell.textContent = text;
+    return cell;
+}
+function createRow(row) {
+    const tr = document.createElement('tr');
+    tr.className = 'food-row';
+    const brandCell = createCell('', 'text-center');
+    const badge = document.createElement('span');
+    badge.className = 'badge';
+    badge.textContent = foodData.brands[foodData.brand[row]];
+    brandCell.appendChild(badge);
+    const productCell = createCell('');
+    const product = document.createElement('div');
+    product.style.fontWeight = '600';
+    product.textContent = foodData.product[row];
+    if (foodData.flavor[row]) {
+        const flavor = document.createElement('span');
+        flavor.className = 'tag-flavor';
+        flavor.textContent = foodData.flavor[row];
+        product.appendChild(flavor);
+    }
+    productCell.appendChild(product);
+    tr.append(
+        brandCell,
+        productCell,
+        createCell(foodData.calories[row], 'text-center'),
+        createCell(foodData.protein[row] + 'g', 'text-center'),
+        createCell(foodData.carbohydrate[row] + 'g', 'text-center'),
+        createCell(foodData.fat[row] + 'g', 'text-center'),
+    );
+    return tr;
+}
+function renderMore() {
+    const fragment = document.createDocumentFragment();
+    matches.slice(rendered, rendered + pageSize).forEach(row => fragment.appendChild(createRow(row)));
+    rendered = Math.min(matches.length, rendered + pageSize);
+    document.querySelector('#food-table tbody').appendChild(fragment);
+}
+new IntersectionObserver(entries => {
+    if (entries[0].isIntersecting && rendered < matches.length) renderMore();
+}, { rootMargin: '800px' }).observe(document.getElementById('load-more'));
+filterTable();
+"""
+
+HISTORY_CSS = """\
+.history-list { display: flex; flex-direction: column; gap: 1.25rem; }
+.history-item { background: var(--card); border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); overflow: hidden; border: 1px solid transparent; transition: background 0.3s, border-color 0.2s; }
+.history-item:hover { border-color: var(--border); }
+.history-header { padding: 1.5rem; display: flex; justify-content: space-between; align-items: center; cursor: pointer; user-select: none; }
+.date-label { font-weight: 800; color: var(--text); font-size: 1.25rem; display: flex; align-items: center; gap: 0.75rem; }
+.chevron { font-size: 0.8rem; color: var(--muted); transition: transform 0.2s; }
+.history-item.open .chevron { transform: rotate(90deg); }
+.summary-stats { display: flex; gap: 1.5rem; }
+.stat-group { display: flex; flex-direction: column; align-items: flex-end; }
+.stat-label { font-size: 0.65rem; text-transform: uppercase; letter-spacing: 0.05em; font-weight: 700; color: var(--muted); }
+.stat-val { color: var(--text); font-size: 1.1rem; font-weight: 700; }
+.over-cut, .under-target { color: var(--warning); }
+.over-maint, .under-maint { color: var(--danger); }
+.success { color: var(--success); }
+.neutral { color: var(--text); }
+.details { display: none; padding: 1.5rem; border-top: 1px solid var(--border); background: var(--bg); transition: background 0.3s; }
+.history-item.open .details { display: block; }
+.history-month { background: var(--card); border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); overflow: hidden; border: 1px solid transparent; transition: background 0.3s, border-color 0.2s; }
+.history-month:hover { border-color: var(--border); }
+.history-month.open > .history-header .chevron { transform: rotate(90deg); }
+.month-days { display: none; flex-direction: column; gap: 1.25rem; padding: 0 1.5rem 1.5rem; }
+.history-month.open .month-days { display: flex; }
+.month-days .history-item { border-color: var(--border); }
+.month-status { color: var(--muted); }
+"""
+
+HISTORY_SCRIPT = """\
+function toggleMonth(month) {
+    month.classList.toggle('open');
+    if (!month.classList.contains('open') || month.dataset.loaded) return;
+    month.dataset.loaded = 'loading';
+    month.querySelector('.month-days').innerHTML = '<div class="month-status">Loading…</div>';
+    const script = document.createElement('script');
+    script.src = month.dataset.src;
+    script.onerror = () => {
+        delete month.dataset.loaded;
+        month.querySelector('.month-days').innerHTML = '<div class="month-status">Could not load this month.</div>';
+    };
+    document.head.appendChild(script);
+}
+function loadHistoryMonth(key, itemsHtml) {
+    const month = document.querySelector(`.history-month[data-month="${key}"]`);
+    if (!month) return;
+    month.dataset.loaded = 'true';
+    month.querySelector('.month-days').innerHTML = itemsHtml;
+}
+document.addEventListener('DOMContentLoaded', () => {
+    const latest = document.querySelector('.history-month');
+    if (latest) toggleMonth(latest);
+});
+"""
+
+# Page-specific rules share class names (.stat-label, .stat-val), so every page
+# kind gets its own stylesheet bundled with the shared one.
+STATIC_ASSETS = {
+    "theme.js": THEME_SCRIPT,
+    "dashboard.css": SITE_CSS + DASHBOARD_CSS,
+    "dashboard.js": DASHBOARD_SCRIPT,
+    "database.css": SITE_CSS + DATABASE_CSS,
+    "database.js": DATABASE_SCRIPT,
+    "history.css": SITE_CSS + HISTORY_CSS,
+    "history.js": HISTORY_SCRIPT,
+}
+ASSET_DIRECTORY = "assets"
+
+
+@functools.lru_cache(maxsize=None)
+def get_asset_file(name: str, minify: bool = False) -> tuple:
+    """Returns the content-hashed file name of a static asset and its contents."""
+    content = STATIC_ASSETS[name]
+    if minify:
+        content = minify_markup(content) + "\n"
+    stem, extension = os.path.splitext(name)
+    digest = hashlib.sha256(content.encode()).hexdigest()[:12]
+    return f"{stem}.{digest}{extension}", content
+
+
+def get_asset_href(
+    name: str, out_path: str, output_directory: str, context: "BuildContext"
+) -> str:
+    """Writes a static asset once per content hash and links it relative to a page."""
+    file_name, content = get_asset_file(name, context.minify)
+    asset_path = os.path.join(output_directory, ASSET_DIRECTORY, file_name)
+    if not os.path.exists(asset_path):
+        write_text_atomically(asset_path, content)
+    relative_path = os.path.relpath(asset_path, os.path.dirname(out_path) or ".")
+    return relative_path.replace(os.sep, "/")
+
+
+def get_shared_head(
+    title: str,
+    page: str,
+    out_path: str,
+    output_directory: str,
+    context: "BuildContext",
+) -> str:
+    stylesheet_href = get_asset_href(f"{page}.css", out_path, output_directory, context)
+    theme_href = get_asset_href("theme.js", out_path, output_directory, context)
+    script_href = get_asset_href(f"{page}.js", out_path, output_directory, context)
     return f"""
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title}</title>
-    <style>
-        :root {{
-            --primary: #2563eb; --bg: #f8fafc; --card: #ffffff; --text: #1e293b;
-            --success: #10b981; --warning: #f59e0b; --danger: #ef4444; --muted: #64748b; --border: #e2e8f0;
-        }}
-        body.dark-mode {{
-            --bg: #0f172a; --card: #1e293b; --text: #f8fafc; --muted: #94a3b8; --border: #334155;
-        }}
-        body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; background: var(--bg); color: var(--text); line-height: 1.5; margin: 0; padding: 2rem; transition: background 0.3s, color 0.3s; }}
-        .container {{ max-width: 1200px; margin: 0 auto; }}
-        header {{ margin-bottom: 2rem; display: flex; justify-content: space-between; align-items: center; }}
-        h1, h2 {{ color: var(--text); margin: 0; }}
-        h2 {{ margin-top: 2rem; margin-bottom: 1rem; }}
-        .nav-link {{ color: var(--primary); text-decoration: none; font-weight: 600; font-size: 0.875rem; }}
-        .nav-link:hover {{ text-decoration: underline; }}
-        
-        .theme-toggle {{
-            background: none; border: 1px solid var(--border); padding: 0.5rem; border-radius: 8px; cursor: pointer; color: var(--muted);
-            display: flex; align-items: center; justify-content: center; transition: all 0.2s;
-        }}
-        .theme-toggle:hover {{ background: var(--border); color: var(--primary); }}
-        .theme-toggle svg {{ width: 18px; height: 18px; }}
-        .sun-icon {{ display: none; }}
-        .dark-mode .sun-icon {{ display: block; }}
-        .dark-mode .moon-icon {{ display: none; }}
-
-        table {{ width: 100%; border-collapse: collapse; background: var(--card); border-radius: 12px; overflow: hidden; box-shadow: 0 1px 3px rgba(0,0,0,0.1); transition: background 0.3s; border: 1px solid var(--border); }}
-        th, td {{ padding: 1rem; text-align: left; border-bottom: 1px solid var(--border); }}
-        th {{ background: #f1f5f9; font-weight: 600; font-size: 0.875rem; color: #475569; }}
-        body.dark-mode th {{ background: #1e293b; color: #cbd5e1; border-bottom: 2px solid var(--primary); }}
-        .text-center {{ text-align: center; }}
-        .badge {{ display: inline-block; padding: 0.25rem 0.5rem; border-radius: 4px; font-size: 0.75rem; font-weight: 600; background: #f1f5f9; color: #475569; }}
-        body.dark-mode .badge {{ background: var(--bg); color: var(--muted); }}
-        .tag-modified {{ display: inline-block; padding: 0.15rem 0.4rem; border-radius: 4px; font-size: 0.65rem; font-weight: 700; text-transform: uppercase; background: #f0f9ff; color: #0369a1; margin-left: 0.5rem; vertical-align: middle; border: 1px solid #e0f2fe; }}
-        .dark-mode .tag-modified {{ background: #0c4a6e; color: #7dd3fc; border-color: #0ea5e9; }}
-        .tag-flavor {{ display: inline-block; padding: 0.15rem 0.4rem; border-radius: 4px; font-size: 0.65rem; font-weight: 700; text-transform: uppercase; background: #f8fafc; color: #475569; margin-left: 0.5rem; vertical-align: middle; border: 1px solid #e2e8f0; }}
-        .dark-mode .tag-flavor {{ background: #334155; color: #cbd5e1; border-color: #475569; }}
-    </style>
-    <script>
-        if (localStorage.getItem('theme') === 'dark') {{
-            document.documentElement.classList.add('dark-mode');
-            document.addEventListener('DOMContentLoaded', () => {{
-                document.body.classList.add('dark-mode');
-            }});
-        }}
-        function toggleTheme() {{
-            const isDark = document.body.classList.toggle('dark-mode');
-            document.documentElement.classList.toggle('dark-mode', isDark);
-            localStorage.setItem('theme', isDark ? 'dark' : 'light');
-        }}
-    </script>
+    <link rel="stylesheet" href="{stylesheet_href}">
+    <script src="{theme_href}"></script>
+    <script src="{script_href}" defer></script>
     """
 
 
@@ -162,24 +514,925 @@ def get_log_path(base_dir: str, date_str: str, create_dirs: bool = False) -> str
     return os.path.join(log_dir, f"{date_str}.json")
 
 
-def run_dashboard_generation(date_str: str = None, output_directory: str = ".") -> None:
+class LogCatalog:
+    """A sorted date index over the logs/YYYY/MM/ shards.
+
+    Year and month directories are listed once, and a month's files are only
+    listed when a query reaches that month, so recent or date-bounded
+    selections never touch older shards.
+    """
+
+    def __init__(self, base_dir: str = "logs") -> None:
+        self.base_dir = base_dir
+        self.months = []
+        for year in self._list_directory(base_dir):
+            if year.isdigit() and len(year) == 4:
+                self.months += [
+                    f"{year}-{month}"
+                    for month in self._list_directory(os.path.join(base_dir, year))
+                    if month.isdigit() and len(month) == 2
+                ]
+        self.months.sort()
+        self._dates = {}
+
+    @staticmethod
+    def _list_directory(path: str) -> list:
+        try:
+            return sorted(entry.name for entry in os.scandir(path) if entry.is_dir())
+        except FileNotFoundError:
+            return []
+
+    def dates_in_month(self, month: str) -> list:
+        if month not in self._dates:
+            directory = os.path.join(self.base_dir, *month.split("-"))
+            dates = []
+            with contextlib.suppress(FileNotFoundError):
+                for entry in os.scandir(directory):
+                    date_str = entry.name.removesuffix(".json")
+                    # Only files exactly where get_log_path would put them count
+                    with contextlib.suppress(ValueError):
+                        if get_log_path(self.base_dir, date_str) == entry.path:
+                            dates.append(date_str)
+            self._dates[month] = sorted(dates)
+        return self._dates[month]
+
+    def path(self, date_str: str) -> str:
+        return get_log_path(self.base_dir, date_str)
+
+    def select(self, days: int = None, since: str = None, until: str = None) -> list:
+        """Returns log paths newest first, within since/until and limited to days."""
+        first = bisect.bisect_left(self.months, since[:7]) if since else 0
+        last = (
+            bisect.bisect_right(self.months, until[:7]) if until else len(self.months)
+        )
+        paths = []
+        for month in reversed(self.months[first:last]):
+            dates = self.dates_in_month(month)
+            start = bisect.bisect_left(dates, since) if since else 0
+            stop = bisect.bisect_right(dates, until) if until else len(dates)
+            for date_str in reversed(dates[start:stop]):
+                paths.append(self.path(date_str))
+                if days and len(paths) == days:
+                    return paths
+        return paths
+
+    def paths(self) -> list:
+        """Returns every log path, oldest first."""
+        return self.select()[::-1]
+
+
+MANIFEST_NAME = ".build_manifest.json"
+CACHE_DIRECTORY = ".cache"
+LOG_READ_THREADS = 16
+SQLITE_NAME = "food_log.sqlite3"
+FOOD_SUMMARY_FIELDS = (
+    "brand",
+    "product_name",
+    "flavor",
+    "calories_kcal",
+    "protein_g",
+    "carbohydrate_g",
+    "fat_g",
+    "aliases",
+)
+
+
+def parse_json(raw: bytes):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def read_json_file(path: str) -> tuple:
+    """Reads and parses a JSON file, returning its size in bytes and its data."""
+    with open(path, "rb") as json_file:
+        raw = json_file.read()
+    return len(raw), parse_json(raw)
+
+
+@functools.lru_cache(maxsize=None)
+def get_generator_version() -> str:
+    """Hashes this script so that any change to the generator invalidates outputs.
+
+    A running process keeps executing the code it started with, so one hash
+    per process is enough.
+    """
+    with open(__file__, "rb") as source_file:
+        return hashlib.sha256(source_file.read()).hexdigest()[:16]
+
+
+def get_today() -> str:
+    os.environ["TZ"] = os.environ.get("TZ", "America/Los_Angeles")
+    time.tzset()
+    return datetime.datetime.now().strftime("%Y-%m-%d")
+
+
+def get_dashboard_output_path(date_str: str = None, output_directory: str = ".") -> str:
+    if date_str:
+        return get_log_path(
+            os.path.join(output_directory, "logs"), date_str, create_dirs=True
+        ).replace(".json", ".html")
+    return os.path.join(output_directory, "index.html")
+
+
+def normalize_food_id(text: str) -> str:
+    return "_".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
+class FoodIndex:
+    """Resolves inventory and log ids to database entries without scanning."""
+
+    def __init__(self, database: dict) -> None:
+        self.database = database
+        self.aliases = {}
+        self.token_runs = {}
+        self.ambiguous = {}
+        for database_id, database_entry in database.items():
+            for alias in database_entry.get("aliases", []):
+                self._add(self.aliases, normalize_food_id(alias), database_id)
+            tokens = normalize_food_id(database_id).split("_")
+            for start in range(len(tokens)):
+                for end in range(start + 1, len(tokens) + 1):
+                    run = "_".join(tokens[start:end])
+                    self._add(self.token_runs, run, database_id)
+
+    @staticmethod
+    def _add(index: dict, key: str, database_id: str) -> None:
+        candidates = index.setdefault(key, [])
+        if database_id not in candidates:
+            candidates.append(database_id)
+
+    def resolve_id(self, food_id: str) -> str:
+        """Looks up an id by exact key, declared alias, then contiguous id tokens."""
+        if not food_id:
+            return None
+        if food_id in self.database:
+            return food_id
+        key = normalize_food_id(food_id)
+        candidates = self.aliases.get(key) or self.token_runs.get(key)
+        if not candidates:
+            return None
+        # Prefer the closest (shortest) id and remember the lookup as ambiguous
+        best_id = min(candidates, key=lambda candidate: (len(candidate), candidate))
+        if len(candidates) > 1:
+            self.ambiguous[food_id] = sorted(candidates)
+        return best_id
+
+    def resolve(self, food_id: str) -> dict:
+        database_id = self.resolve_id(food_id)
+        return self.database[database_id] if database_id else {}
+
+    def warnings(self) -> list:
+        return [
+            f"Warning: ambiguous food id '{food_id}' matches {', '.join(candidates)}"
+            for food_id, candidates in sorted(self.ambiguous.items())
+        ]
+
+
+class BuildProfiler:
+    """Accumulates wall time, call counts and bytes per build phase and page.
+
+    Phases may nest (for example "load json" inside "render history"), so
+    their times are not meant to add up to the total.
+    """
+
+    def __init__(self) -> None:
+        self.phases = {}
+        self.pages = {}
+
+    @contextlib.contextmanager
+    def measure(self, name: str, page: bool = False):
+        table = self.pages if page else self.phases
+        record = table.setdefault(name, {"calls": 0, "seconds": 0.0, "bytes": 0})
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["calls"] += 1
+            record["seconds"] += time.perf_counter() - start
+
+    def snapshot(self) -> dict:
+        return {"phases": self.phases, "pages": self.pages}
+
+    def merge(self, snapshot: dict) -> None:
+        for table_name in ("phases", "pages"):
+            table = getattr(self, table_name)
+            for name, other in snapshot[table_name].items():
+                record = table.setdefault(
+                    name, {"calls": 0, "seconds": 0.0, "bytes": 0}
+                )
+                for field in record:
+                    record[field] += other[field]
+
+    def report(self) -> str:
+        lines = []
+        for title, table in (("Phase", self.phases), ("Page", self.pages)):
+            width = max([len(title), *map(len, table)])
+            lines.append(
+                f"{title:<{width}}  {'Calls':>7}  {'Seconds':>9}  {'Bytes':>11}"
+            )
+            for name, record in sorted(
+                table.items(), key=lambda item: (-item[1]["seconds"], item[0])
+            ):
+                lines.append(
+                    f"{name:<{width}}  {record['calls']:>7}  "
+                    f"{record['seconds']:>9.4f}  {record['bytes']:>11}"
+                )
+            lines.append("")
+        return "\n".join(lines).rstrip()
+
+
+NUTRITION_FIELDS = ("calories_kcal", "protein_g", "carbohydrate_g", "fat_g")
+COLUMNAR_MIN_ROWS = 2048
+
+
+@functools.lru_cache(maxsize=None)
+def get_numpy():
+    """Imports NumPy on first use, so builds with only small tables skip the import."""
     try:
-        with open("data/goals.json", "r") as goals_file:
-            goals = json.load(goals_file)
-        with open("data/inventory.json", "r") as inventory_file:
-            inventory = json.load(inventory_file)
-        with open("data/food_database.json", "r") as database_file:
-            database = json.load(database_file)
+        import numpy
+    except ImportError:  # The array module columns are used instead
+        return None
+    return numpy
+
+
+class NutritionTable:
+    """Nutrition values stored column by column, one row per food or day.
+
+    Tables of COLUMNAR_MIN_ROWS rows or more use NumPy columns when the "fast"
+    extra is installed, so ordering, sums and goal classes are vectorized.
+    Otherwise the columns are typed arrays and the same operations are a single
+    sort or bisection pass over them.
+    """
+
+    def __init__(self, rows: Iterable[dict]) -> None:
+        rows = list(rows)
+        self.numpy = get_numpy() if len(rows) >= COLUMNAR_MIN_ROWS else None
+        self.columns = {}
+        for field in NUTRITION_FIELDS:
+            values = [row.get(field, 0) for row in rows]
+            self.columns[field] = (
+                self.numpy.array(values, dtype=float)
+                if self.numpy
+                else array.array("d", values)
+            )
+
+    def __len__(self) -> int:
+        return len(self.columns["calories_kcal"])
+
+    def sorted_rows(self, names: list) -> list:
+        """Orders rows by protein, then calories (high to low), then name."""
+        protein = self.columns["protein_g"]
+        calories = self.columns["calories_kcal"]
+        lowered_names = [name.lower() for name in names]
+        if self.numpy:
+            # lexsort is stable and treats its last key as the primary one
+            keys = (self.numpy.array(lowered_names, dtype=str), -calories, -protein)
+            return self.numpy.lexsort(keys).tolist()
+        return sorted(
+            range(len(self)),
+            key=lambda row: (-protein[row], -calories[row], lowered_names[row]),
+        )
+
+    def sums(self) -> dict:
+        return {
+            field: column.sum().item() if self.numpy else sum(column)
+            for field, column in self.columns.items()
+        }
+
+    def calories_classes(self, goals: dict) -> list:
+        """Classifies every row's calories the way get_calories_class does."""
+        calories = self.columns["calories_kcal"]
+        target = goals.get("calories_target", 1800)
+        maintenance = goals.get("calories_maintenance", 2300)
+        midpoint = (target + maintenance) / 2
+        if goals.get("phase", "cut") == "bulk" and maintenance <= target:
+            labels = ("under-maint", "under-target", "neutral", "success")
+            thresholds, side = (maintenance, midpoint, target), "right"
+        elif goals.get("phase", "cut") != "bulk" and target <= maintenance:
+            labels = ("success", "neutral", "over-cut", "over-maint")
+            thresholds, side = (target, midpoint, maintenance), "left"
+        else:
+            # Goals with the thresholds out of order keep the chained comparisons
+            return [get_calories_class(value, goals) for value in calories]
+        if self.numpy:
+            indexes = self.numpy.searchsorted(thresholds, calories, side=side)
+            return [labels[index] for index in indexes.tolist()]
+        search = bisect.bisect_right if side == "right" else bisect.bisect_left
+        return [labels[search(thresholds, value)] for value in calories]
+
+
+TREND_WINDOW_DAYS = 30
+
+
+class AggregateStore:
+    """Per-day, per-week and per-month nutrition rollups kept up to date per log.
+
+    Each day remembers the size and mtime of the log it was read from, so an
+    update only re-reads logs that changed and applies the difference to the
+    week and month buckets they belong to.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        try:
+            with open(path, "r") as store_file:
+                stored = json.load(store_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        self.days = stored.get("days", {})
+        self.weeks = stored.get("weeks", {})
+        self.months = stored.get("months", {})
+
+    @staticmethod
+    def get_bucket_keys(date_str: str) -> tuple:
+        year, week, _ = datetime.date.fromisoformat(date_str).isocalendar()
+        return f"{year}-W{week:02d}", date_str[:7]
+
+    def _apply(self, date_str: str, totals: dict, sign: int) -> None:
+        week_key, month_key = self.get_bucket_keys(date_str)
+        for buckets, key in ((self.weeks, week_key), (self.months, month_key)):
+            bucket = buckets.setdefault(
+                key, {"days": 0, **dict.fromkeys(NUTRITION_FIELDS, 0)}
+            )
+            bucket["days"] += sign
+            for field in NUTRITION_FIELDS:
+                bucket[field] = round(bucket[field] + sign * totals[field], 2)
+            if bucket["days"] == 0:
+                del buckets[key]
+
+    def update(
+        self, log_files: list, context: "BuildContext", since: str = None
+    ) -> int:
+        """Re-reads changed logs, drops deleted ones, and returns how many changed.
+
+        With since, log_files only covers days from that date on, and older
+        days keep the totals stored by an earlier update.
+        """
+        changed = 0
+        seen = set()
+        signatures = {}
+        for log_path in log_files:
+            date_str = os.path.basename(log_path).replace(".json", "")
+            seen.add(date_str)
+            stat = os.stat(log_path)
+            signature = [stat.st_size, stat.st_mtime_ns]
+            day = self.days.get(date_str)
+            if not day or day["signature"] != signature:
+                signatures[log_path] = signature
+        for log_path, log in context.load_logs(signatures):
+            date_str = os.path.basename(log_path).replace(".json", "")
+            log_totals = log.get("totals", {})
+            totals = {field: log_totals.get(field, 0) for field in NUTRITION_FIELDS}
+            if date_str in self.days:
+                self._apply(date_str, self.days[date_str]["totals"], -1)
+            self._apply(date_str, totals, 1)
+            self.days[date_str] = {"signature": signatures[log_path], "totals": totals}
+            changed += 1
+        for date_str in sorted(set(self.days) - seen):
+            if since and date_str < since:
+                continue
+            self._apply(date_str, self.days.pop(date_str)["totals"], -1)
+            changed += 1
+        return changed
+
+    def save(self) -> None:
+        write_json_atomically(
+            self.path,
+            {"days": self.days, "weeks": self.weeks, "months": self.months},
+            separators=(",", ":"),
+            sort_keys=True,
+        )
+
+    def get_window(self, end_date: str, days: int) -> dict:
+        end = datetime.date.fromisoformat(end_date)
+        logged = [
+            self.days[key]["totals"]
+            for key in (
+                (end - datetime.timedelta(days=offset)).isoformat()
+                for offset in range(days)
+            )
+            if key in self.days
+        ]
+        window = {"days": len(logged)}
+        for field in NUTRITION_FIELDS:
+            total = sum(totals[field] for totals in logged)
+            window[field] = round(total / len(logged)) if logged else 0
+        return window
+
+    def trends(self, goals: dict, end_date: str) -> dict:
+        maintenance = goals.get("calories_maintenance", 2300)
+        protein_goal = goals.get("protein_g", 0)
+        week_key, month_key = self.get_bucket_keys(end_date)
+        week = self.weeks.get(week_key, {"days": 0, "calories_kcal": 0})
+
+        streak = 0
+        day = datetime.date.fromisoformat(end_date)
+        today = self.days.get(end_date)
+        # Today may still be in progress, so it only extends an existing streak
+        if not today or today["totals"]["protein_g"] < protein_goal:
+            day -= datetime.timedelta(days=1)
+        while protein_goal > 0:
+            record = self.days.get(day.isoformat())
+            if not record or record["totals"]["protein_g"] < protein_goal:
+                break
+            streak += 1
+            day -= datetime.timedelta(days=1)
+
+        return {
+            "end_date": end_date,
+            "last_7_days": self.get_window(end_date, 7),
+            "last_30_days": self.get_window(end_date, TREND_WINDOW_DAYS),
+            "week": {
+                "key": week_key,
+                "days": week["days"],
+                "deficit": round(maintenance * week["days"] - week["calories_kcal"]),
+            },
+            "month": dict(self.months.get(month_key, {"days": 0}), key=month_key),
+            "protein_streak": streak,
+        }
+
+
+def render_trends_section(trends: dict) -> str:
+    def window_card(label: str, window: dict) -> str:
+        return f"""<div class="trend-card"><div class="trend-label">{label}</div><div class="trend-value">{window['calories_kcal']} kcal</div><div class="trend-detail">{window['protein_g']}g protein · {window['days']} days logged</div></div>"""
+
+    week = trends["week"]
+    return f"""<section class="trends"><h2>Trends</h2><div class="trend-grid">
+            {window_card("7-Day Average", trends["last_7_days"])}
+            {window_card("30-Day Average", trends["last_30_days"])}
+            <div class="trend-card"><div class="trend-label">Week {week['key'][-2:]} Deficit</div><div class="trend-value">{week['deficit']} kcal</div><div class="trend-detail">vs. maintenance · {week['days']} days logged</div></div>
+            <div class="trend-card"><div class="trend-label">Protein Streak</div><div class="trend-value">{trends['protein_streak']} days</div><div class="trend-detail">at or above the protein goal</div></div>
+        </div></section>
+        """
+
+
+PLAN_COUNT = 3
+PLAN_MAX_SERVINGS = 2
+PLAN_CALORIE_STEP = 10
+PLAN_MAX_CANDIDATES = 40
+
+
+def solve_meal_plans(
+    totals: dict,
+    goals: dict,
+    inventory: list,
+    food_index: FoodIndex,
+    count: int = PLAN_COUNT,
+    max_servings: int = PLAN_MAX_SERVINGS,
+) -> dict:
+    """Finds the inventory combinations with the most protein for the calories left.
+
+    This is a bounded knapsack over the remaining calories in PLAN_CALORIE_STEP
+    units. best[steps] memoizes the top plans that use at most that many steps,
+    and each plan is a linked (item, servings, previous) chain so extending one
+    is O(1). Calories are rounded up to a whole step, so no plan overshoots.
+    """
+    budget = goals.get("calories_target", 0) - totals.get("calories_kcal", 0)
+    budget_steps = int(budget // PLAN_CALORIE_STEP) if budget > 0 else 0
+    servings_by_id = {}
+    for inventory_item in inventory:
+        database_id = food_index.resolve_id(inventory_item["id"])
+        quantity = inventory_item.get("quantity", 0)
+        if database_id:
+            servings_by_id[database_id] = servings_by_id.get(database_id, 0) + quantity
+
+    items = []
+    for database_id, quantity in servings_by_id.items():
+        database_entry = food_index.database[database_id]
+        calories = database_entry.get("calories_kcal", 0)
+        protein = database_entry.get("protein_g", 0)
+        weight = max(1, int(-(-calories // PLAN_CALORIE_STEP)))
+        servings = min(int(quantity), max_servings, budget_steps // weight)
+        if protein > 0 and servings > 0:
+            items.append((database_id, database_entry, weight, protein, servings))
+    # Dense items first fill the top plans early, so more budgets are skipped;
+    # only the densest candidates are searched, which keeps a full day's budget
+    # to a few milliseconds however large the inventory grows
+    items.sort(key=lambda item: item[3] / item[2], reverse=True)
+    del items[PLAN_MAX_CANDIDATES:]
+
+    # Plans sort as (protein, -calories, serial, chain); the unique serial settles
+    # ties before a comparison could reach the chains
+    serials = itertools.count()
+    best = [[(0, 0, next(serials), None)]] * (budget_steps + 1)
+    for item_index, (_, database_entry, weight, protein, servings) in enumerate(items):
+        calories = database_entry.get("calories_kcal", 0)
+        # Walk the budget downwards so best[smaller] still excludes this item
+        for steps in range(budget_steps, weight - 1, -1):
+            current = best[steps]
+            usable = range(1, min(servings, steps // weight) + 1)
+            # Skip budgets where even the best extension cannot enter the top plans
+            if len(current) == count and current[-1][0] > max(
+                best[steps - serving * weight][0][0] + serving * protein
+                for serving in usable
+            ):
+                continue
+            candidates = list(current)
+            for serving in usable:
+                for plan in best[steps - serving * weight]:
+                    candidates.append(
+                        (
+                            plan[0] + serving * protein,
+                            plan[1] - serving * calories,
+                            next(serials),
+                            (item_index, serving, plan[3]),
+                        )
+                    )
+            candidates.sort(reverse=True)
+            best[steps] = candidates[:count]
+
+    plans = []
+    for _, _, _, chain in best[budget_steps]:
+        plan_items = []
+        while chain is not None:
+            item_index, serving, chain = chain
+            plan_items.append((items[item_index], serving))
+        if not plan_items:
+            continue
+        plan_items.reverse()
+        plans.append(
+            {
+                "items": [
+                    {"id": database_id, "servings": serving}
+                    for (database_id, _, _, _, _), serving in plan_items
+                ],
+                **{
+                    field: scale_quantity(
+                        sum(
+                            database_entry.get(field, 0) * serving
+                            for (_, database_entry, _, _, _), serving in plan_items
+                        ),
+                        1,
+                    )
+                    for field in NUTRITION_FIELDS
+                },
+            }
+        )
+    return {"budget": scale_quantity(budget, 1), "plans": plans}
+
+
+def get_food_label(database_entry: dict) -> str:
+    label = format_title(database_entry.get("product_name", ""))
+    if database_entry.get("flavor"):
+        label += f" ({format_title(database_entry['flavor'])})"
+    return label
+
+
+def render_meal_plans_section(meal_plans: dict, food_index: FoodIndex) -> str:
+    if not meal_plans["plans"]:
+        return ""
+    plan_rows = []
+    for plan in meal_plans["plans"]:
+        items_html = ", ".join(
+            f"{item['servings']}× {html.escape(get_food_label(food_index.database[item['id']]))}"
+            for item in plan["items"]
+        )
+        plan_rows.append(
+            f"<tr class='plan-row' data-calories='{plan['calories_kcal']}' data-protein='{plan['protein_g']}' data-carbohydrate='{plan['carbohydrate_g']}' data-fat='{plan['fat_g']}' onclick='toggleProjection(this)' style='cursor: pointer;'><td style='font-weight: 500;'>{items_html}</td><td class='text-center'>{plan['calories_kcal']}</td><td class='text-center'>{plan['protein_g']}g</td><td class='text-center'>{plan['carbohydrate_g']}g</td><td class='text-center'>{plan['fat_g']}g</td></tr>"
+        )
+    plan_rows_html = "\n".join(plan_rows)
+    return f"""<section style="margin-top: 2rem;"><h2>Suggested Plans <span style="color: var(--muted); font-size: 0.9rem; font-weight: 500;">{meal_plans['budget']} kcal left</span></h2><table id="plan-table"><thead><tr><th>Items</th><th class='text-center'>Calories</th><th class='text-center'>Protein</th><th class='text-center'>Carbohydrate</th><th class='text-center'>Fat</th></tr></thead><tbody>{plan_rows_html}</tbody></table></section>
+        """
+
+
+class BuildContext:
+    """Loads the shared data files once and hands them to every renderer."""
+
+    def __init__(
+        self, data_directory: str = "data", cache_directory: str = CACHE_DIRECTORY
+    ) -> None:
+        self.data_directory = data_directory
+        self.cache_directory = cache_directory
+        self.minify = False
+        self.site_url = None
+        self.aggregate_since = None
+        self.images = {}
+        self.files_parsed = 0
+        self.bytes_read = 0
+        self.title_cache_hits = 0
+        self.title_cache_misses = 0
+        self._title_cache_baseline = format_title.cache_info()
+        self.profiler = BuildProfiler()
+        self._cache = {}
+        self._hashes = {}
+
+    def file_hash(self, path: str) -> str:
+        if path not in self._hashes:
+            if not os.path.exists(path):
+                return None
+            with self.profiler.measure("hash inputs") as record:
+                with open(path, "rb") as hashed_file:
+                    raw = hashed_file.read()
+                self.bytes_read += len(raw)
+                record["bytes"] += len(raw)
+                self._hashes[path] = hashlib.sha256(raw).hexdigest()
+        return self._hashes[path]
+
+    def page_inputs(self, *paths: str, **extra) -> dict:
+        inputs = {"generator": get_generator_version(), "minify": self.minify}
+        for path in paths:
+            inputs[path] = self.file_hash(path)
+        inputs.update(extra)
+        return inputs
+
+    def data_path(self, name: str) -> str:
+        return os.path.join(self.data_directory, name)
+
+    def load_json(self, path: str):
+        with self.profiler.measure("load json") as record:
+            size, data = read_json_file(path)
+            self.files_parsed += 1
+            self.bytes_read += size
+            record["bytes"] += size
+            return data
+
+    def load_logs(self, paths: Iterable[str]) -> Iterator[tuple]:
+        """Yields (path, log) in the given order, reading uncached logs concurrently.
+
+        Logs are kept for the rest of the build, so history, the per-day pages
+        and the aggregates share a single read of each file.
+        """
+        logs = self._cache.setdefault("logs", {})
+        paths = list(paths)
+        missing = [path for path in dict.fromkeys(paths) if path not in logs]
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(LOG_READ_THREADS, len(missing)))
+        ) as executor:
+            results = executor.map(read_json_file, missing)
+            for path in paths:
+                if path not in logs:
+                    with self.profiler.measure("load json") as record:
+                        size, logs[path] = next(results)
+                    self.files_parsed += 1
+                    self.bytes_read += size
+                    record["bytes"] += size
+                yield path, logs[path]
+
+    def load_log(self, path: str) -> dict:
+        for _, log in self.load_logs([path]):
+            return log
+
+    def invalidate(self, path: str) -> None:
+        """Forgets everything derived from a source file that changed on disk."""
+        self._hashes.pop(path, None)
+        self._cache.get("logs", {}).pop(path, None)
+        if os.path.dirname(path) == self.data_directory:
+            name = os.path.basename(path)
+            self._cache.pop(name, None)
+            if name == "food_database.json":
+                self._cache.pop("food_summary", None)
+                self._cache.pop("food_index", None)
+        else:
+            self._cache.pop("aggregates", None)
+            self._cache.pop("log_catalog", None)
+
+    def _load_data_file(self, name: str):
+        if name not in self._cache:
+            self._cache[name] = self.load_json(self.data_path(name))
+        return self._cache[name]
+
+    @property
+    def goals(self) -> dict:
+        return self._load_data_file("goals.json")
+
+    @property
+    def inventory(self) -> list:
+        return self._load_data_file("inventory.json")
+
+    @property
+    def database(self) -> dict:
+        """Hot per-food fields, served from a cache rebuilt when the source changes."""
+        if "food_summary" not in self._cache:
+            self._cache["food_summary"] = self._load_food_summary()
+        return self._cache["food_summary"]
+
+    @property
+    def food_details(self) -> dict:
+        """The full food database, including micronutrients and ingredients."""
+        return self._load_data_file("food_database.json")
+
+    def _load_food_summary(self) -> dict:
+        source_path = self.data_path("food_database.json")
+        source_hash = self.file_hash(source_path)
+        if source_hash is None:
+            raise FileNotFoundError(
+                errno.ENOENT, os.strerror(errno.ENOENT), source_path
+            )
+        cache_path = os.path.join(self.cache_directory, "food_summary.json")
+        with contextlib.suppress(FileNotFoundError, json.JSONDecodeError):
+            cached = self.load_json(cache_path)
+            if cached.get("source_hash") == source_hash:
+                return cached["foods"]
+
+        foods = {
+            food_id: {
+                field: food[field] for field in FOOD_SUMMARY_FIELDS if field in food
+            }
+            for food_id, food in self.food_details.items()
+        }
+        write_json_atomically(
+            cache_path,
+            {"source_hash": source_hash, "foods": foods},
+            separators=(",", ":"),
+        )
+        return foods
+
+    @property
+    def food_index(self) -> FoodIndex:
+        if "food_index" not in self._cache:
+            database = self.database
+            with self.profiler.measure("build food index"):
+                self._cache["food_index"] = FoodIndex(database)
+        return self._cache["food_index"]
+
+    @property
+    def log_catalog(self) -> LogCatalog:
+        if "log_catalog" not in self._cache:
+            self._cache["log_catalog"] = LogCatalog()
+        return self._cache["log_catalog"]
+
+    @property
+    def aggregates(self) -> AggregateStore:
+        if "aggregates" not in self._cache:
+            store_path = os.path.join(self.cache_directory, "aggregates.json")
+            store = AggregateStore(store_path)
+            log_files = self.log_catalog.select(since=self.aggregate_since)[::-1]
+            with self.profiler.measure("update aggregates"):
+                if store.update(log_files, self, self.aggregate_since):
+                    store.save()
+            self._cache["aggregates"] = store
+        return self._cache["aggregates"]
+
+    def day_table(self, dates: list) -> NutritionTable:
+        days = self.aggregates.days
+        return NutritionTable(days[date_str]["totals"] for date_str in dates)
+
+    def trends(self, end_date: str) -> dict:
+        try:
+            goals = self.goals
+        except FileNotFoundError:
+            goals = {}
+        return self.aggregates.trends(goals, end_date)
+
+    def preload(self) -> None:
+        for name in ("goals.json", "inventory.json"):
+            with contextlib.suppress(FileNotFoundError):
+                self._load_data_file(name)
+        with contextlib.suppress(FileNotFoundError):
+            self.food_index
+        self.aggregates
+
+    def counters(self) -> dict:
+        food_index = self._cache.get("food_index")
+        title_cache = format_title.cache_info()
+        return {
+            "files_parsed": self.files_parsed,
+            "bytes_read": self.bytes_read,
+            "title_cache_hits": self.title_cache_hits
+            + title_cache.hits
+            - self._title_cache_baseline.hits,
+            "title_cache_misses": self.title_cache_misses
+            + title_cache.misses
+            - self._title_cache_baseline.misses,
+            "ambiguous": dict(food_index.ambiguous) if food_index else {},
+            "profile": self.profiler.snapshot(),
+        }
+
+    def reset_counters(self) -> None:
+        self.files_parsed = 0
+        self.bytes_read = 0
+        self.title_cache_hits = 0
+        self.title_cache_misses = 0
+        self._title_cache_baseline = format_title.cache_info()
+        self.profiler = BuildProfiler()
+        if "food_index" in self._cache:
+            self._cache["food_index"].ambiguous.clear()
+
+    def merge_counters(self, counters: dict) -> None:
+        self.files_parsed += counters["files_parsed"]
+        self.bytes_read += counters["bytes_read"]
+        self.title_cache_hits += counters["title_cache_hits"]
+        self.title_cache_misses += counters["title_cache_misses"]
+        self.profiler.merge(counters["profile"])
+        if counters["ambiguous"]:
+            self.food_index.ambiguous.update(counters["ambiguous"])
+
+    def warnings(self) -> list:
+        food_index = self._cache.get("food_index")
+        return food_index.warnings() if food_index else []
+
+    def summary(self) -> str:
+        counters = self.counters()
+        return (
+            f"Build summary: parsed {counters['files_parsed']} files, "
+            f"read {counters['bytes_read']} bytes, "
+            f"format_title cache {counters['title_cache_hits']} hits / "
+            f"{counters['title_cache_misses']} misses"
+        )
+
+
+class BuildManifest:
+    """Records the input hashes each output was rendered from."""
+
+    def __init__(self, output_directory: str = ".") -> None:
+        self.output_directory = output_directory
+        self.path = os.path.join(output_directory, MANIFEST_NAME)
+        self.rendered = 0
+        self.skipped = 0
+        self.removed = 0
+        try:
+            with open(self.path, "r") as manifest_file:
+                self.outputs = json.load(manifest_file).get("outputs", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.outputs = {}
+
+    def _key(self, out_path: str) -> str:
+        return os.path.relpath(out_path, self.output_directory)
+
+    def is_fresh(self, out_path: str, inputs: dict) -> bool:
+        entry = self.outputs.get(self._key(out_path))
+        return (
+            entry is not None and entry["inputs"] == inputs and os.path.exists(out_path)
+        )
+
+    def needs_build(self, out_path: str, inputs: dict, incremental: bool) -> bool:
+        if incremental and self.is_fresh(out_path, inputs):
+            self.skipped += 1
+            return False
+        return True
+
+    def record(self, out_path: str, inputs: dict, source: str = None) -> None:
+        self.outputs[self._key(out_path)] = {"inputs": inputs, "source": source}
+        self.rendered += 1
+
+    def prune(self) -> None:
+        """Removes outputs whose source log no longer exists."""
+        for key, entry in sorted(self.outputs.items()):
+            source = entry.get("source")
+            if not source or os.path.exists(source):
+                continue
+            stale_paths = [os.path.join(self.output_directory, key)]
+            if os.path.abspath(self.output_directory) != os.path.abspath("."):
+                stale_paths.append(os.path.join(self.output_directory, source))
+            for stale_path in stale_paths:
+                # Month fragments record their log directory, whose staged copy
+                # is a directory that the per-day entries empty on their own
+                if os.path.isfile(stale_path):
+                    os.remove(stale_path)
+                    click.echo(f"Removed: {stale_path}")
+                    with contextlib.suppress(OSError):
+                        os.rmdir(os.path.dirname(stale_path))
+            del self.outputs[key]
+            self.removed += 1
+
+    def save(self) -> None:
+        with open(self.path, "w") as manifest_file:
+            json.dump(
+                {"outputs": self.outputs}, manifest_file, indent=2, sort_keys=True
+            )
+
+    def summary(self) -> str:
+        return f"Manifest: rendered {self.rendered}, skipped {self.skipped}, removed {self.removed}"
+
+
+def write_text_atomically(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w", encoding="utf-8", newline="\n") as text_file:
+        text_file.write(text)
+    os.replace(temporary_path, path)
+
+
+def write_json_atomically(path: str, data, **dump_options) -> None:
+    """Writes JSON to a temporary file and renames it over the destination."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, **dump_options)
+            if dump_options.get("indent") is not None:
+                json_file.write("\n")
+        os.replace(temporary_path, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary_path)
+
+
+def run_dashboard_generation(
+    date_str: str = None, output_directory: str = ".", context: BuildContext = None
+) -> None:
+    context = context or BuildContext()
+    try:
+        goals = context.goals
+        inventory = context.inventory
+        food_index = context.food_index
     except FileNotFoundError as error:
         click.echo(f"Error: Missing data file - {error}")
         return
 
-    os.environ["TZ"] = os.environ.get("TZ", "America/Los_Angeles")
-    time.tzset()
-    target_date = date_str if date_str else datetime.datetime.now().strftime("%Y-%m-%d")
+    target_date = date_str if date_str else get_today()
     log_path = get_log_path("logs", target_date)
     daily_log = (
-        json.load(open(log_path, "r"))
+        context.load_log(log_path)
         if os.path.exists(log_path)
         else {
             "entries": [],
@@ -205,23 +1458,18 @@ def run_dashboard_generation(date_str: str = None, output_directory: str = ".")
     for inventory_item in inventory:
         if inventory_item.get("quantity", 0) <= 0:
             continue
-        database_entry = database.get(inventory_item["id"])
-        if not database_entry:
-            for database_id, database_value in database.items():
-                if inventory_item["id"] in database_id:
-                    database_entry = database_value
-                    break
+        database_entry = food_index.resolve(inventory_item["id"])
         if database_entry:
             inventory_to_display.append((database_entry, inventory_item))
 
     # Sort by protein (high to low), then calories (high to low), then product name
-    inventory_to_display.sort(
-        key=lambda pair: (
-            -pair[0].get("protein_g", 0),
-            -pair[0].get("calories_kcal", 0),
-            pair[0].get("product_name", "").lower(),
+    nutrition = NutritionTable(entry for entry, _ in inventory_to_display)
+    inventory_to_display = [
+        inventory_to_display[row]
+        for row in nutrition.sorted_rows(
+            [entry.get("product_name", "") for entry, _ in inventory_to_display]
         )
-    )
+    ]
 
     for database_entry, inventory_item in inventory_to_display:
         protein, carbohydrate, fat, calories = (
@@ -257,7 +1505,7 @@ def run_dashboard_generation(date_str: str = None, output_directory: str = ".")
         log_rows_html = "<tr><td colspan='6' style='text-align:center; padding: 1rem; color: #94a3b8;'>No food logged yet today.</td></tr>"
     else:
         for entry in daily_log["entries"]:
-            database_entry = database.get(entry.get("id"), {})
+            database_entry = food_index.resolve(entry.get("id"))
             brand = database_entry.get("brand", "N/A")
 
             # Detect modification from the log entry's display_name
@@ -295,27 +1543,29 @@ def run_dashboard_generation(date_str: str = None, output_directory: str = ".")
             )
         log_rows_html = "\n".join(log_rows_list)
 
+    trends_html = "" if date_str else render_trends_section(context.trends(target_date))
+    meal_plans_html = (
+        ""
+        if date_str
+        else render_meal_plans_section(
+            solve_meal_plans(totals, goals, inventory, food_index), food_index
+        )
+    )
+    out_path = get_dashboard_output_path(date_str, output_directory)
+    preview_meta = ""
+    screenshot = None if date_str else context.images.get("screenshot.png")
+    if screenshot and context.site_url:
+        # Link previews only follow absolute URLs; the last variant is the
+        # full-width PNG/JPEG, which every scraper reads
+        preview_href = html.escape(
+            f"{context.site_url.rstrip('/')}/{ASSET_DIRECTORY}/{screenshot[-1]['file']}"
+        )
+        preview_meta = f'\n    <meta property="og:image" content="{preview_href}">'
+
     html_output = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
-    {get_shared_head(f"Food Log Dashboard - {target_date}")}
-    <style>
-        .grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1.5rem; margin-bottom: 2rem; }}
-        .card {{ background: var(--card); padding: 1.25rem; border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); display: flex; flex-direction: column; gap: 0.1rem; transition: background 0.3s; }}
-        .stat-label {{ font-size: 0.7rem; color: var(--muted); text-transform: uppercase; letter-spacing: 0.05em; font-weight: 700; display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.2rem; }}
-        .stat-val {{ font-size: 1.75rem; font-weight: 800; color: var(--text); line-height: 1.1; }}
-        .goal-display-container {{ color: var(--muted); font-weight: 700; font-size: 1.1rem; display: flex; align-items: center; margin: 0.4rem 0; min-height: 1.5rem; }}
-        .progress-bg {{ background: var(--border); height: 6px; border-radius: 3px; overflow: hidden; margin-top: 0.2rem; }}
-        .progress-fill {{ background: var(--primary); height: 100%; transition: width 0.3s ease, background 0.3s ease; }}
-        .tooltip {{ visibility: hidden; width: 130px; background-color: #1e293b; color: #fff; text-align: left; border-radius: 6px; padding: 8px 10px; position: absolute; z-index: 10; bottom: 140%; right: 0; opacity: 0; transition: opacity 0.2s; font-size: 0.7rem; text-transform: none; box-shadow: 0 10px 15px -3px rgba(0,0,0,0.1); pointer-events: none; }}
-        .info-icon:hover .tooltip {{ visibility: visible; opacity: 1; }}
-        input[type=number]::-webkit-inner-spin-button {{ -webkit-appearance: none; margin: 0; }}
-        .editable-goal {{ border: 1px solid transparent; background: transparent; color: inherit; font: inherit; width: 100%; padding: 0; margin: 0; text-align: left; cursor: pointer; }}
-        .editable-goal:hover {{ color: var(--primary); }}
-        .editable-goal:focus {{ border-bottom: 1px solid var(--primary); outline: none; cursor: text; color: var(--text); }}
-        tr.selected {{ background: #bfdbfe !important; }}
-        body.dark-mode tr.selected {{ background: #1e40af !important; }}
-    </style>
+    {get_shared_head(f"Food Log Dashboard - {target_date}", "dashboard", out_path, output_directory, context)}{preview_meta}
 </head>
 <body>
     <div class="container">
@@ -359,160 +1609,159 @@ def run_dashboard_generation(date_str: str = None, output_directory: str = ".")
             </div>
         </div>
 
-        <section><h2>Today's Log</h2><table id="log-table"><thead><tr><th class="text-center">Brand</th><th>Product</th><th class="text-center">Calories</th><th class="text-center">Protein</th><th class="text-center">Carbohydrate</th><th class="text-center">Fat</th></tr></thead><tbody>{log_rows_html}</tbody></table></section>
-        <section style="margin-top: 2rem;"><h2>Current Inventory</h2><table id="inventory-table"><thead><tr><th class='text-center'>Brand</th><th>Product</th><th class='text-center'>Calories</th><th class='text-center'>Protein</th><th class='text-center'>Carbohydrate</th><th class='text-center'>Fat</th></tr></thead><tbody>{inventory_rows_html}</tbody></table></section>
+        {trends_html}<section><h2>Today's Log</h2><table id="log-table"><thead><tr><th class="text-center">Brand</th><th>Product</th><th class="text-center">Calories</th><th class="text-center">Protein</th><th class="text-center">Carbohydrate</th><th class="text-center">Fat</th></tr></thead><tbody>{log_rows_html}</tbody></table></section>
+        {meal_plans_html}<section style="margin-top: 2rem;"><h2>Current Inventory</h2><table id="inventory-table"><thead><tr><th class='text-center'>Brand</th><th>Product</th><th class='text-center'>Calories</th><th class='text-center'>Protein</th><th class='text-center'>Carbohydrate</th><th class='text-center'>Fat</th></tr></thead><tbody>{inventory_rows_html}</tbody></table></section>
     </div>
 
     <script>
         const currentTotals = {{ calories: {totals['calories_kcal']}, protein: {totals['protein_g']}, carbohydrate: {totals['carbohydrate_g']}, fat: {totals['fat_g']} }};
         const maintenanceCalories = {goals['calories_maintenance']};
-
-        function toggleProjection(row) {{
-            row.classList.toggle('selected');
-            updateProjection();
-        }}
-
-        function updateProjection() {{
-            const goals = {{
-                target: parseFloat(document.getElementById('goal-calories-input').value) || 0,
-                protein: parseFloat(document.getElementById('goal-protein-input').value) || 0,
-                carbohydrate: parseFloat(document.getElementById('goal-carbohydrate-input').value) || 0,
-                fat: parseFloat(document.getElementById('goal-fat-input').value) || 0
-            }};
-            let projectedCalories = 0, projectedProtein = 0, projectedCarbohydrate = 0, projectedFat = 0;
-            document.querySelectorAll('.inventory-row.selected').forEach(row => {{
-                projectedCalories += parseFloat(row.dataset.calories);
-                projectedProtein += parseFloat(row.dataset.protein);
-                projectedCarbohydrate += parseFloat(row.dataset.carbohydrate);
-                projectedFat += parseFloat(row.dataset.fat);
-            }});
-            updateCardCalories(currentTotals.calories + projectedCalories, projectedCalories, goals.target, maintenanceCalories);
-            updateCardMacro('protein', currentTotals.protein + projectedProtein, projectedProtein, goals.protein, 'g', false);
-            updateCardMacro('carbohydrate', currentTotals.carbohydrate + projectedCarbohydrate, projectedCarbohydrate, goals.carbohydrate, 'g', true);
-            updateCardMacro('fat', currentTotals.fat + projectedFat, projectedFat, goals.fat, 'g', true);
-        }}
-
-        function updateCardCalories(total, projected, target, maintenance) {{
-            const card = document.getElementById('card-calories');
-            const span = card.querySelector('.current');
-            const fill = card.querySelector('.progress-fill');
-            const mode = document.getElementById('goal-calories-input').dataset.mode;
-            const midpoint = (target + maintenance) / 2;
-            
-            span.textContent = total;
-            let color = '';
-
-            if (mode === 'bulk') {{
-                if (total < maintenance) color = 'var(--danger)';
-                else if (total < midpoint) color = 'var(--warning)';
-                else if (total < target) color = 'var(--text)';
-                else if (projected > 0) color = 'var(--primary)';
-                else color = 'var(--success)';
-            }} else {{
-                if (total > maintenance) color = 'var(--danger)';
-                else if (total > midpoint) color = 'var(--warning)';
-                else if (total > target) color = 'var(--text)';
-                else if (projected > 0) color = 'var(--primary)';
-                else color = 'var(--success)';
-            }}
-
-            span.style.color = color;
-            fill.style.background = color || 'var(--primary)';
-            fill.style.width = target > 0 ? Math.min(100, Math.round((total / target) * 100)) + '%' : '0%';
-        }}
-
-        function updateCardMacro(id, total, projected, goal, unit, strict) {{
-            const card = document.getElementById('card-' + id);
-            const span = card.querySelector('.current');
-            const fill = card.querySelector('.progress-fill');
-            span.textContent = total + unit;
-            let color = '';
-            if (goal > 0) {{
-                if (strict && total > goal) color = 'var(--danger)';
-                else if (total >= goal) color = 'var(--success)';
-                else if (projected > 0) color = 'var(--primary)';
-            }} else if (projected > 0) {{
-                color = 'var(--primary)';
-            }}
-            span.style.color = color;
-            fill.style.background = color || 'var(--primary)';
-            fill.style.width = goal > 0 ? Math.min(100, Math.round((total / goal) * 100)) + '%' : '0%';
-        }}
-        updateProjection();
     </script>
 </body>
 </html>"""
 
-    if date_str:
-        out_path = get_log_path(
-            os.path.join(output_directory, "logs"), date_str, create_dirs=True
-        ).replace(".json", ".html")
-    else:
-        out_path = os.path.join(output_directory, "index.html")
-    with open(out_path, "w") as output_file:
-        output_file.write(html_output)
+    with PageWriter(
+        out_path, profiler=context.profiler, minify=context.minify
+    ) as writer:
+        writer.write(html_output)
     click.echo(f"Generated: {out_path}")
 
 
-def run_database_generation(output_directory: str = ".") -> None:
+def minify_markup(text: str) -> str:
+    """Drops indentation and blank lines, keeping line breaks so inline JS stays valid."""
+    return "\n".join(line.strip() for line in text.split("\n") if line.strip())
+
+
+class PageWriter:
+    """Streams a page to disk in chunks instead of assembling it in memory.
+
+    Output is normalized line by line (LF endings, no trailing whitespace and a
+    final newline) so builds are byte-for-byte reproducible; with minify the
+    indentation and blank lines are dropped as well.
+    """
+
+    def __init__(
+        self,
+        out_path: str,
+        buffer_size: int = 1 << 16,
+        profiler: BuildProfiler = None,
+        minify: bool = False,
+    ) -> None:
+        self.out_path = out_path
+        self.buffer_size = buffer_size
+        self.profiler = profiler or BuildProfiler()
+        self.minify = minify
+        self._pending = ""
+
+    def __enter__(self) -> "PageWriter":
+        self._file = open(
+            self.out_path,
+            "w",
+            encoding="utf-8",
+            newline="\n",
+            buffering=self.buffer_size,
+        )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with self.profiler.measure("write pages") as record:
+            if self._pending:
+                self._file.write(self._normalize_line(self._pending))
+                self._pending = ""
+            self._file.close()
+            record["bytes"] += os.path.getsize(self.out_path)
+
+    def _normalize_line(self, line: str) -> str:
+        line = line.strip() if self.minify else line.rstrip()
+        return f"{line}\n" if line or not self.minify else ""
+
+    def write(self, chunk: str) -> None:
+        with self.profiler.measure("write pages"):
+            lines = (self._pending + chunk).split("\n")
+            # The last piece may be the start of a line continued by the next chunk
+            self._pending = lines.pop()
+            self._file.write("".join(map(self._normalize_line, lines)))
+
+    def write_joined(self, chunks: Iterable[str], separator: str = "\n") -> None:
+        for position, chunk in enumerate(chunks):
+            if position:
+                self.write(separator)
+            self.write(chunk)
+
+
+SEARCH_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def build_food_search_index(sorted_database: list) -> dict:
+    """Builds columnar food data and a token-to-row inverted index for the page."""
+    brands = sorted(set(str(value.get("brand", "N/A")) for value in sorted_database))
+    brand_codes = {brand: code for code, brand in enumerate(brands)}
+    columns = {
+        "brands": brands,
+        "brand": [],
+        "product": [],
+        "flavor": [],
+        "calories": [],
+        "protein": [],
+        "carbohydrate": [],
+        "fat": [],
+    }
+    postings = {}
+    for row, value in enumerate(sorted_database):
+        brand = str(value.get("brand", "N/A"))
+        product = format_title(value.get("product_name", ""))
+        flavor = format_title(value.get("flavor", ""))
+        columns["brand"].append(brand_codes[brand])
+        columns["product"].append(product)
+        columns["flavor"].append(flavor)
+        columns["calories"].append(value.get("calories_kcal", 0))
+        columns["protein"].append(value.get("protein_g", 0))
+        columns["carbohydrate"].append(value.get("carbohydrate_g", 0))
+        columns["fat"].append(value.get("fat_g", 0))
+        searchable = " ".join(
+            [brand, product, flavor, *map(str, value.get("ingredients", []))]
+        )
+        for token in set(SEARCH_TOKEN_PATTERN.findall(searchable.lower())):
+            postings.setdefault(token, []).append(row)
+    columns["tokens"] = sorted(postings)
+    columns["postings"] = [postings[token] for token in columns["tokens"]]
+    return columns
+
+
+def run_database_generation(
+    output_directory: str = ".", context: BuildContext = None
+) -> None:
+    context = context or BuildContext()
     try:
-        with open("data/food_database.json", "r") as database_file:
-            database = json.load(database_file)
+        database = context.food_details
     except FileNotFoundError:
         return
 
-    rows_list = []
     # Sort by protein (high to low), then calories (high to low), then product name
-    sorted_database = sorted(
-        database.values(),
-        key=lambda item: (
-            -item.get("protein_g", 0),
-            -item.get("calories_kcal", 0),
-            item.get("product_name", "").lower(),
-        ),
+    foods = list(database.values())
+    sorted_database = [
+        foods[row]
+        for row in NutritionTable(foods).sorted_rows(
+            [food.get("product_name", "") for food in foods]
+        )
+    ]
+    search_index = build_food_search_index(sorted_database)
+    brand_options = " ".join(
+        f'<option value="{code}">{html.escape(brand)}</option>'
+        for code, brand in enumerate(search_index["brands"])
+    )
+    search_index_json = json.dumps(search_index, separators=(",", ":")).replace(
+        "</", "<\\/"
     )
-    for value in sorted_database:
-        brand = str(value.get("brand", "N/A"))
-        product = format_title(value.get("product_name", ""))
-        flavor = format_title(value.get("flavor", ""))
-        calories, protein, carbohydrate, fat = (
-            value.get("calories_kcal", 0),
-            value.get("protein_g", 0),
-            value.get("carbohydrate_g", 0),
-            value.get("fat_g", 0),
-        )
-        ingredients = ", ".join(value.get("ingredients", []))
-        escaped_brand = html.escape(brand)
-        escaped_product = html.escape(product)
-        escaped_flavor = html.escape(flavor)
-        escaped_search = html.escape(
-            f"{brand.lower()} {product.lower()} {flavor.lower()} {ingredients.lower()}",
-            quote=True,
-        )
-
-        rows_list.append(f"""
-            <tr class="food-row" data-search="{escaped_search}">
-                <td class="text-center"><span class="badge">{escaped_brand}</span></td>
-                <td><div style="font-weight: 600;">{escaped_product}{f'<span class="tag-flavor">{escaped_flavor}</span>' if flavor else ''}</div></td>
-                <td class="text-center">{calories}</td>
-                <td class="text-center">{protein}g</td>
-                <td class="text-center">{carbohydrate}g</td>
-                <td class="text-center">{fat}g</td>
-            </tr>""")
-    rows_html = "\n".join(rows_list)
 
-    html_output = f"""<!DOCTYPE html>
+    out_path = os.path.join(output_directory, "food_database.html")
+    with PageWriter(
+        out_path, profiler=context.profiler, minify=context.minify
+    ) as writer:
+        writer.write(f"""<!DOCTYPE html>
 <html lang="en">
 <head>
-    {get_shared_head("Food Database")}
-    <style>
-        .controls {{ background: var(--card); padding: 1.25rem; border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); margin-bottom: 2rem; display: grid; grid-template-columns: 2fr 1fr 1fr; gap: 1.5rem; align-items: end; transition: background 0.3s; }}
-        .control-group {{ display: flex; flex-direction: column; gap: 0.5rem; }}
-        .control-group label {{ font-size: 0.75rem; font-weight: 700; color: var(--muted); text-transform: uppercase; letter-spacing: 0.05em; }}
-        input, select {{ padding: 0.6rem; border: 1px solid var(--border); border-radius: 6px; font-size: 0.875rem; color: var(--text); background: var(--card); outline: none; transition: border-color 0.2s, background 0.3s; }}
-        input:focus, select:focus {{ border-color: var(--primary); }}
-        .empty-state {{ padding: 4rem; text-align: center; color: var(--muted); display: none; }}
-    </style>
+    {get_shared_head("Food Database", "database", out_path, output_directory, context)}
 </head>
 <body>
     <div class="container">
@@ -525,129 +1774,86 @@ def run_database_generation(output_directory: str = ".") -> None:
         </header>
         <div class="controls">
             <div class="control-group"><label>Search Product</label><input type="text" id="search" placeholder="Search name, ingredients, brand..." oninput="filterTable()"></div>
-            <div class="control-group"><label>Filter by Brand</label><select id="brand-filter" onchange="filterTable()"><option value="">All Brands</option>{" ".join([f'<option value="{brand}">{brand}</option>' for brand in sorted(list(set(value.get('brand', 'N/A') for value in database.values())))])}</select></div>
+            <div class="control-group"><label>Filter by Brand</label><select id="brand-filter" onchange="filterTable()"><option value="">All Brands</option>{brand_options}</select></div>
             <div class="control-group"><label>Sort By</label><select id="sort-by" onchange="sortTable()"><option value="0">Brand</option><option value="1">Product</option><option value="2">Calories</option><option value="3" selected>Protein</option><option value="4">Carbohydrate</option><option value="5">Fat</option></select></div>
         </div>
-        <table id="food-table"><thead><tr><th class="text-center">Brand</th><th>Product</th><th class="text-center">Calories</th><th class="text-center">Protein</th><th class="text-center">Carbohydrate</th><th class="text-center">Fat</th></tr></thead><tbody>{rows_html}</tbody></table>
+        <table id="food-table"><thead><tr><th class="text-center">Brand</th><th>Product</th><th class="text-center">Calories</th><th class="text-center">Protein</th><th class="text-center">Carbohydrate</th><th class="text-center">Fat</th></tr></thead><tbody></tbody></table>
         <div id="empty-state" class="empty-state">No items match your search criteria.</div>
+        <div id="load-more"></div>
     </div>
-    <script>
-        function filterTable() {{
-            const search_term = document.getElementById('search').value.toLowerCase();
-            const brand_filter = document.getElementById('brand-filter').value.toLowerCase();
-            const rows = document.querySelectorAll('.food-row');
-            let visible = 0;
-            rows.forEach(row => {{
-                const text = row.getAttribute('data-search');
-                const brand = row.querySelector('.badge').textContent.toLowerCase();
-                const match = text.includes(search_term) && (brand_filter === "" || brand === brand_filter);
-                row.style.display = match ? '' : 'none';
-                if (match) visible++;
-            }});
-            document.getElementById('empty-state').style.display = visible === 0 ? 'block' : 'none';
-        }}
-        function sortTable() {{
-            const index = parseInt(document.getElementById('sort-by').value);
-            const table = document.getElementById('food-table');
-            const rows = Array.from(table.querySelectorAll('tbody tr'));
-            rows.sort((a, b) => {{
-                let value_a = a.cells[index].textContent.replace('g','');
-                let value_b = b.cells[index].textContent.replace('g','');
-                if (!isNaN(value_a) && !isNaN(value_b)) return parseFloat(value_b) - parseFloat(value_a);
-                return value_a.localeCompare(value_b);
-            }});
-            rows.forEach(row => table.querySelector('tbody').appendChild(row));
-        }}
-    </script>
+    <script id="food-data" type="application/json">{search_index_json}</script>
 </body>
-</html>"""
-    out_path = os.path.join(output_directory, "food_database.html")
-    with open(out_path, "w") as output_file:
-        output_file.write(html_output)
+</html>""")
     click.echo(f"Generated: {out_path}")
 
 
-def run_history_generation(output_directory: str = ".", limit: int = None) -> None:
-    log_files = sorted(glob.glob("logs/**/*.json", recursive=True), reverse=True)
-    if limit:
-        log_files = log_files[:limit]
-    try:
-        with open("data/goals.json", "r") as goals_file:
-            goals = json.load(goals_file)
-        with open("data/food_database.json", "r") as database_file:
-            database = json.load(database_file)
-    except FileNotFoundError:
-        goals = {}
-        database = {}
-
+def get_calories_class(calories: float, goals: dict) -> str:
     phase = goals.get("phase", "cut")
     target = goals.get("calories_target", 1800)
     maintenance = goals.get("calories_maintenance", 2300)
     midpoint = (target + maintenance) / 2
+    if phase == "bulk":
+        if calories < maintenance:
+            return "under-maint"
+        elif calories < midpoint:
+            return "under-target"
+        elif calories < target:
+            return "neutral"
+        return "success"
+    if calories > maintenance:
+        return "over-maint"
+    elif calories > midpoint:
+        return "over-cut"
+    elif calories > target:
+        return "neutral"
+    return "success"
+
+
+def render_history_entry_row(entry: dict, food_index: FoodIndex) -> str:
+    database_entry = food_index.resolve(entry.get("id"))
+    brand = database_entry.get("brand", "N/A")
+
+    is_modified = "(Modified)" in entry.get("display_name", "")
+    product_name = database_entry.get("product_name", entry.get("display_name", ""))
+
+    if not database_entry.get("product_name"):
+        if brand != "N/A":
+            if product_name.startswith(f"{brand} - "):
+                product_name = product_name[len(brand) + 3 :]
+            elif product_name.startswith(brand):
+                product_name = product_name[len(brand) :].lstrip(" -")
+        product_name = product_name.replace("(Modified)", "").strip()
+
+    product = format_title(product_name)
+    flavor_tag = ""
+    if (
+        database_entry.get("flavor")
+        and database_entry.get("flavor").lower() not in product.lower()
+    ):
+        flavor_tag = (
+            f'<span class="tag-flavor">{format_title(database_entry["flavor"])}</span>'
+        )
+
+    tag = '<span class="tag-modified">Modified</span>' if is_modified else ""
+    return f"<tr><td class='text-center'><span class='badge'>{brand}</span></td><td><span style='font-weight:600'>{product}</span>{flavor_tag}{tag}</td><td class='text-center'>{entry['calories_kcal']}</td><td class='text-center'>{entry['protein_g']}g</td><td class='text-center'>{entry['carbohydrate_g']}g</td><td class='text-center'>{entry['fat_g']}g</td></tr>"
 
-    items_list = []
-    for log_path in log_files:
-        date_str = os.path.basename(log_path).replace(".json", "")
-        with open(log_path, "r") as log_file:
-            data = json.load(log_file)
+
+def iter_history_items(
+    log_files: list, goals: dict, food_index: FoodIndex, context: BuildContext
+) -> Iterator[str]:
+    dates = [os.path.basename(log_path).replace(".json", "") for log_path in log_files]
+    calories_classes = context.day_table(dates).calories_classes(goals)
+    logs = context.load_logs(log_files)
+    for (_, data), date_str, calories_class in zip(logs, dates, calories_classes):
 
         totals = data.get("totals", {})
         entries = data.get("entries", [])
         calories, protein = totals.get("calories_kcal", 0), totals.get("protein_g", 0)
+        table_rows = "\n".join(
+            render_history_entry_row(entry, food_index) for entry in entries
+        )
 
-        calories_class = ""
-        if phase == "bulk":
-            if calories < maintenance:
-                calories_class = "under-maint"
-            elif calories < midpoint:
-                calories_class = "under-target"
-            elif calories < target:
-                calories_class = "neutral"
-            else:
-                calories_class = "success"
-        else:
-            if calories > maintenance:
-                calories_class = "over-maint"
-            elif calories > midpoint:
-                calories_class = "over-cut"
-            elif calories > target:
-                calories_class = "neutral"
-            else:
-                calories_class = "success"
-
-        table_rows_list = []
-        for entry in entries:
-            database_entry = database.get(entry.get("id"), {})
-            brand = database_entry.get("brand", "N/A")
-
-            is_modified = "(Modified)" in entry.get("display_name", "")
-            product_name = database_entry.get(
-                "product_name", entry.get("display_name", "")
-            )
-
-            if not database_entry.get("product_name"):
-                if brand != "N/A":
-                    if product_name.startswith(f"{brand} - "):
-                        product_name = product_name[len(brand) + 3 :]
-                    elif product_name.startswith(brand):
-                        product_name = product_name[len(brand) :].lstrip(" -")
-                product_name = product_name.replace("(Modified)", "").strip()
-
-            product = format_title(product_name)
-            flavor_tag = ""
-            if (
-                database_entry.get("flavor")
-                and database_entry.get("flavor").lower() not in product.lower()
-            ):
-                flavor_tag = f'<span class="tag-flavor">{format_title(database_entry["flavor"])}</span>'
-
-            tag = '<span class="tag-modified">Modified</span>' if is_modified else ""
-            table_rows_list.append(
-                f"<tr><td class='text-center'><span class='badge'>{brand}</span></td><td><span style='font-weight:600'>{product}</span>{flavor_tag}{tag}</td><td class='text-center'>{entry['calories_kcal']}</td><td class='text-center'>{entry['protein_g']}g</td><td class='text-center'>{entry['carbohydrate_g']}g</td><td class='text-center'>{entry['fat_g']}g</td></tr>"
-            )
-        table_rows = "\n".join(table_rows_list)
-
-        items_list.append(f"""
+        yield f"""
             <div class="history-item">
                 <div class="history-header" onclick="this.parentElement.classList.toggle('open')">
                     <div class="date-label"><span class="chevron">▶</span>{date_str}</div>
@@ -657,32 +1863,102 @@ def run_history_generation(output_directory: str = ".", limit: int = None) -> No
                     </div>
                 </div>
                 <div class="details"><table><thead><tr><th class="text-center">Brand</th><th>Product</th><th class="text-center">Calories</th><th class="text-center">Protein</th><th class="text-center">Carbohydrate</th><th class="text-center">Fat</th></tr></thead><tbody>{table_rows}</tbody></table></div>
-            </div>""")
-    items_html = "\n".join(items_list)
+            </div>"""
 
-    html_output = f"""<!DOCTYPE html>
+
+def group_logs_by_month(log_files: list) -> dict:
+    months = {}
+    for log_path in log_files:
+        months.setdefault(os.path.basename(log_path)[:7], []).append(log_path)
+    return months
+
+
+def get_history_month_path(
+    month: str, output_directory: str = ".", create_dirs: bool = True
+) -> str:
+    month_log_path = get_log_path(
+        os.path.join(output_directory, "logs"), f"{month}-01", create_dirs
+    )
+    return os.path.join(os.path.dirname(month_log_path), "history.js")
+
+
+def run_history_month_generation(
+    month: str,
+    log_files: list,
+    output_directory: str = ".",
+    context: BuildContext = None,
+) -> None:
+    """Writes one month of history details as a script loaded on demand."""
+    context = context or BuildContext()
+    try:
+        goals = context.goals
+        food_index = context.food_index
+    except FileNotFoundError:
+        goals = {}
+        food_index = FoodIndex({})
+
+    items_html = "\n".join(iter_history_items(log_files, goals, food_index, context))
+    if context.minify:
+        items_html = minify_markup(items_html)
+    out_path = get_history_month_path(month, output_directory)
+    with PageWriter(
+        out_path, profiler=context.profiler, minify=context.minify
+    ) as writer:
+        writer.write(
+            f"loadHistoryMonth({json.dumps(month)}, {json.dumps(items_html)});\n"
+        )
+    click.echo(f"Generated: {out_path}")
+
+
+def render_history_month(month: str, log_files: list, context: BuildContext) -> str:
+    days = len(log_files)
+    sums = context.day_table(
+        [os.path.basename(log_path).replace(".json", "") for log_path in log_files]
+    ).sums()
+    calories, protein = sums["calories_kcal"], sums["protein_g"]
+    month_label = datetime.datetime.strptime(month, "%Y-%m").strftime("%B %Y")
+    month_src = os.path.relpath(
+        get_history_month_path(month, create_dirs=False), "."
+    ).replace(os.sep, "/")
+    return f"""
+            <div class="history-month" data-month="{month}" data-src="{month_src}">
+                <div class="history-header" onclick="toggleMonth(this.parentElement)">
+                    <div class="date-label"><span class="chevron">▶</span>{month_label}</div>
+                    <div class="summary-stats">
+                        <div class="stat-group"><span class="stat-label">Days</span><span class="stat-val">{days}</span></div>
+                        <div class="stat-group"><span class="stat-label">Avg Calories</span><span class="stat-val">{round(calories / days)}</span></div>
+                        <div class="stat-group"><span class="stat-label">Avg Protein</span><span class="stat-val">{round(protein / days)}g</span></div>
+                    </div>
+                </div>
+                <div class="month-days"></div>
+            </div>"""
+
+
+def run_history_generation(
+    output_directory: str = ".",
+    limit: int = None,
+    context: BuildContext = None,
+    include_months: bool = True,
+    since: str = None,
+    until: str = None,
+) -> None:
+    context = context or BuildContext()
+    log_files = context.log_catalog.select(limit, since, until)
+    months = group_logs_by_month(log_files)
+    trends_html = (
+        render_trends_section(context.trends(os.path.basename(log_files[0])[:10]))
+        if log_files
+        else ""
+    )
+
+    out_path = os.path.join(output_directory, "history.html")
+    with PageWriter(
+        out_path, profiler=context.profiler, minify=context.minify
+    ) as writer:
+        writer.write(f"""<!DOCTYPE html>
 <html lang="en">
 <head>
-    {get_shared_head("History")}
-    <style>
-        .history-list {{ display: flex; flex-direction: column; gap: 1.25rem; }}
-        .history-item {{ background: var(--card); border-radius: 12px; box-shadow: 0 1px 3px rgba(0,0,0,0.1); overflow: hidden; border: 1px solid transparent; transition: background 0.3s, border-color 0.2s; }}
-        .history-item:hover {{ border-color: var(--border); }}
-        .history-header {{ padding: 1.5rem; display: flex; justify-content: space-between; align-items: center; cursor: pointer; user-select: none; }}
-        .date-label {{ font-weight: 800; color: var(--text); font-size: 1.25rem; display: flex; align-items: center; gap: 0.75rem; }}
-        .chevron {{ font-size: 0.8rem; color: var(--muted); transition: transform 0.2s; }}
-        .history-item.open .chevron {{ transform: rotate(90deg); }}
-        .summary-stats {{ display: flex; gap: 1.5rem; }}
-        .stat-group {{ display: flex; flex-direction: column; align-items: flex-end; }}
-        .stat-label {{ font-size: 0.65rem; text-transform: uppercase; letter-spacing: 0.05em; font-weight: 700; color: var(--muted); }}
-        .stat-val {{ color: var(--text); font-size: 1.1rem; font-weight: 700; }}
-        .over-cut, .under-target {{ color: var(--warning); }}
-        .over-maint, .under-maint {{ color: var(--danger); }}
-        .success {{ color: var(--success); }}
-        .neutral {{ color: var(--text); }}
-        .details {{ display: none; padding: 1.5rem; border-top: 1px solid var(--border); background: var(--bg); transition: background 0.3s; }}
-        .history-item.open .details {{ display: block; }}
-    </style>
+    {get_shared_head("History", "history", out_path, output_directory, context)}
 </head>
 <body>
     <div class="container">
@@ -693,15 +1969,92 @@ def run_history_generation(output_directory: str = ".", limit: int = None) -> No
                 {get_theme_toggle_html()}
             </div>
         </header>
-        <div class="history-list">{items_html}</div>
+        {trends_html}<div class="history-list">""")
+        writer.write_joined(
+            render_history_month(month, month_logs, context)
+            for month, month_logs in months.items()
+        )
+        writer.write("""</div>
     </div>
 </body>
-</html>"""
-    out_path = os.path.join(output_directory, "history.html")
-    with open(out_path, "w") as output_file:
-        output_file.write(html_output)
+</html>""")
     click.echo(f"Generated: {out_path}")
 
+    if include_months:
+        for month, month_logs in months.items():
+            run_history_month_generation(
+                month, month_logs, output_directory=output_directory, context=context
+            )
+
+
+PAGE_RENDERERS = {
+    "dashboard": run_dashboard_generation,
+    "database": run_database_generation,
+    "history": run_history_generation,
+    "history_month": run_history_month_generation,
+}
+
+_worker_context = None
+
+
+def _initialize_worker(context: BuildContext) -> None:
+    global _worker_context
+    _worker_context = context
+
+
+def _run_task(task: tuple, context: BuildContext) -> None:
+    out_path, renderer, arguments = task
+    with context.profiler.measure(f"render {renderer}") as phase_record:
+        with context.profiler.measure(out_path, page=True) as page_record:
+            PAGE_RENDERERS[renderer](context=context, **arguments)
+            if os.path.exists(out_path):
+                page_record["bytes"] += os.path.getsize(out_path)
+        phase_record["bytes"] += page_record["bytes"]
+
+
+def _render_page(task: tuple) -> tuple:
+    _worker_context.reset_counters()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        _run_task(task, _worker_context)
+    return output.getvalue(), _worker_context.counters()
+
+
+def render_pages(tasks: list, context: BuildContext, jobs: int = 1) -> None:
+    """Renders (out_path, renderer, arguments) tasks, echoing output in task order."""
+    if jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            _run_task(task, context)
+        return
+    context.preload()
+    chunk_size = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_initialize_worker, initargs=(context,)
+    ) as executor:
+        for output, counters in executor.map(_render_page, tasks, chunksize=chunk_size):
+            click.echo(output, nl=False)
+            context.merge_counters(counters)
+
+
+def echo_build_warnings(context: BuildContext) -> None:
+    for warning in context.warnings():
+        click.echo(warning, err=True)
+
+
+class IsoDate(click.ParamType):
+    """A YYYY-MM-DD option value, kept as the string the log catalog compares."""
+
+    name = "YYYY-MM-DD"
+
+    def convert(self, value, param, ctx) -> str:
+        try:
+            return datetime.date.fromisoformat(value).isoformat()
+        except ValueError:
+            self.fail(f"{value!r} is not a YYYY-MM-DD date", param, ctx)
+
+
+ISO_DATE = IsoDate()
+
 
 @click.group()
 def cli():
@@ -711,21 +2064,35 @@ def cli():
 @cli.command()
 @click.option("--output-directory", default=".", help="Output directory")
 def dashboard(output_directory: str):
-    run_dashboard_generation(output_directory=output_directory)
+    context = BuildContext()
+    run_dashboard_generation(output_directory=output_directory, context=context)
+    echo_build_warnings(context)
 
 
 @cli.command()
 @click.option("--date", help="YYYY-MM-DD")
 @click.option("--output-directory", default=".", help="Output directory")
 def log(date: str, output_directory: str):
-    run_dashboard_generation(date, output_directory=output_directory)
+    context = BuildContext()
+    run_dashboard_generation(date, output_directory=output_directory, context=context)
+    echo_build_warnings(context)
 
 
 @cli.command()
 @click.option("--output-directory", default=".", help="Output directory")
 @click.option("--days", default=None, type=int, help="Limit history to the last N days")
-def history(output_directory: str, days: int):
-    run_history_generation(output_directory=output_directory, limit=days)
+@click.option("--since", type=ISO_DATE, help="Only include logs from this date on")
+@click.option("--until", type=ISO_DATE, help="Only include logs up to this date")
+def history(output_directory: str, days: int, since: str, until: str):
+    context = BuildContext()
+    run_history_generation(
+        output_directory=output_directory,
+        limit=days,
+        context=context,
+        since=since,
+        until=until,
+    )
+    echo_build_warnings(context)
 
 
 @cli.command()
@@ -739,36 +2106,1287 @@ def database(output_directory: str):
 @click.option(
     "--days", default=None, type=int, help="Limit generation to the last N days"
 )
-def all(output_directory: str, days: int):
-    if output_directory != ".":
-        os.makedirs(os.path.join(output_directory, "data"), exist_ok=True)
-        for data_file in glob.glob("data/*.json"):
-            shutil.copy(data_file, os.path.join(output_directory, "data"))
-
-        # Handle sharded logs
-        log_files = glob.glob("logs/**/*.json", recursive=True)
-        for log_file in log_files:
-            # Create corresponding directories in the output
-            dest_dir = os.path.join(output_directory, os.path.dirname(log_file))
-            os.makedirs(dest_dir, exist_ok=True)
-            shutil.copy(log_file, dest_dir)
-
-        if os.path.exists("screenshot.png"):
-            shutil.copy("screenshot.png", output_directory)
-
-    run_dashboard_generation(output_directory=output_directory)
-    run_database_generation(output_directory=output_directory)
-    run_history_generation(output_directory=output_directory, limit=days)
+@click.option("--since", type=ISO_DATE, help="Only generate logs from this date on")
+@click.option("--until", type=ISO_DATE, help="Only generate logs up to this date")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only re-render pages whose inputs changed since the last build",
+)
+@click.option(
+    "--jobs",
+    default=os.cpu_count() or 1,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Number of processes used to render pages",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print wall time, call counts and bytes per build phase and page",
+)
+@click.option(
+    "--profile-trace",
+    is_flag=True,
+    help="Also write build_profile.json and a cProfile build_profile.prof to the "
+    "output directory (pages rendered by --jobs workers are not in the .prof)",
+)
+@click.option(
+    "--minify",
+    is_flag=True,
+    help="Strip indentation and blank lines from pages and compact copied JSON",
+)
+@click.option(
+    "--sqlite",
+    is_flag=True,
+    help=f"Also bring the SQLite mirror in {CACHE_DIRECTORY}/{SQLITE_NAME} up to date",
+)
+@click.option(
+    "--site-url",
+    default=None,
+    help="Absolute URL the site is served from, used for the og:image link preview",
+)
+def all(
+    output_directory: str,
+    days: int,
+    since: str,
+    until: str,
+    incremental: bool,
+    jobs: int,
+    profile: bool,
+    profile_trace: bool,
+    minify: bool,
+    sqlite: bool,
+    site_url: str,
+):
+    context = BuildContext()
+    context.minify = minify
+    context.site_url = site_url
+    profiler = cProfile.Profile() if profile_trace else None
+    if profiler:
+        profiler.enable()
+    with context.profiler.measure("total"):
+        build_site(output_directory, days, incremental, jobs, context, since, until)
+        if sqlite:
+            with context.profiler.measure("sync sqlite"):
+                mirror = SQLiteMirror(
+                    os.path.join(context.cache_directory, SQLITE_NAME)
+                )
+                try:
+                    click.echo(f"SQLite: synced {mirror.sync(context)} changed files")
+                finally:
+                    mirror.close()
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(output_directory, "build_profile.prof"))
+        with open(
+            os.path.join(output_directory, "build_profile.json"), "w"
+        ) as trace_file:
+            json.dump(context.profiler.snapshot(), trace_file, indent=2, sort_keys=True)
+    if profile or profile_trace:
+        click.echo(context.profiler.report())
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clone_file(source: str, destination: str) -> bool:
+    """Makes a copy-on-write clone where the filesystem supports FICLONE."""
+    if fcntl is None or not hasattr(fcntl, "FICLONE"):
+        return False
+    try:
+        with open(source, "rb") as source_file:
+            with open(destination, "wb") as destination_file:
+                fcntl.ioctl(
+                    destination_file.fileno(), fcntl.FICLONE, source_file.fileno()
+                )
+    except OSError:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(destination)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def stage_minified_json(source: str, destination: str) -> tuple:
+    with open(source, "rb") as source_file:
+        minified = json.dumps(
+            json.load(source_file), ensure_ascii=False, separators=(",", ":")
+        ).encode()
+    with contextlib.suppress(FileNotFoundError):
+        # Never write through a hardlink left by an earlier unminified build
+        if not os.path.samefile(source, destination):
+            with open(destination, "rb") as destination_file:
+                if destination_file.read() == minified:
+                    return "skipped", 0
+        os.remove(destination)
+    with open(destination, "wb") as destination_file:
+        destination_file.write(minified)
+    return "copied", len(minified)
+
+
+def stage_file(source: str, destination: str, minify: bool = False) -> tuple:
+    """Brings one asset up to date and returns how it was staged and bytes written."""
+    if minify and source.endswith(".json"):
+        return stage_minified_json(source, destination)
+    source_stat = os.stat(source)
+    with contextlib.suppress(FileNotFoundError):
+        destination_stat = os.stat(destination)
+        if os.path.samestat(source_stat, destination_stat):
+            return "skipped", 0
+        if destination_stat.st_size == source_stat.st_size:
+            if destination_stat.st_mtime_ns == source_stat.st_mtime_ns:
+                return "skipped", 0
+            # Fresh checkouts touch every mtime, so fall back to the contents
+            if hash_file(destination) == hash_file(source):
+                os.utime(
+                    destination,
+                    ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns),
+                )
+                return "skipped", 0
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+        return "linked", 0
+    except OSError:
+        pass
+    if clone_file(source, destination):
+        return "linked", 0
+    shutil.copy2(source, destination)
+    return "copied", source_stat.st_size
+
+
+def stage_assets(
+    output_directory: str, jobs: int, minify: bool, log_files: list
+) -> dict:
+    """Hardlinks, clones or copies the data files, logs and screenshot into the output.
+
+    Files whose size and mtime (or, failing that, contents) already match are
+    left alone, so repeated builds only touch what changed. With minify the
+    JSON files are rewritten compactly instead. Staged data files and logs
+    whose source is gone are removed.
+    """
+    sources = glob.glob("data/*.json") + log_files
+    # Kept at its original path so existing links to it keep working
+    if os.path.exists("screenshot.png"):
+        sources.append("screenshot.png")
+    for directory in {os.path.dirname(source) for source in sources}:
+        os.makedirs(os.path.join(output_directory, directory), exist_ok=True)
+    staged = {"copied": 0, "linked": 0, "skipped": 0, "removed": 0, "bytes": 0}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for outcome, bytes_written in executor.map(
+            lambda source: stage_file(
+                source, os.path.join(output_directory, source), minify
+            ),
+            sources,
+        ):
+            staged[outcome] += 1
+            staged["bytes"] += bytes_written
+
+    current = {os.path.normpath(source) for source in sources}
+    staged_paths = glob.glob(os.path.join(output_directory, "data", "*.json"))
+    staged_paths += glob.glob(
+        os.path.join(output_directory, "logs", "**", "*.json"), recursive=True
+    )
+    for staged_path in staged_paths:
+        if os.path.relpath(staged_path, output_directory) not in current:
+            os.remove(staged_path)
+            staged["removed"] += 1
+            with contextlib.suppress(OSError):
+                os.rmdir(os.path.dirname(staged_path))
+    return staged
+
+
+IMAGE_WIDTHS = (480, 800)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+IMAGE_MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+}
+IMAGE_ENCODER_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 60, "speed": 8},
+    "png": {"optimize": True},
+    "jpg": {"quality": 85, "optimize": True},
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_image_settings_key() -> str:
+    """Hashes everything besides the source bytes that shapes the cached variants."""
+    settings = {
+        "pillow": Image is not None,
+        "avif": Image is not None and features.check("avif"),
+        "widths": IMAGE_WIDTHS,
+        "options": IMAGE_ENCODER_OPTIONS,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def get_image_sources() -> list:
+    sources = ["screenshot.png"] if os.path.exists("screenshot.png") else []
+    sources += sorted(
+        path
+        for path in glob.glob("images/**/*", recursive=True)
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return sources
+
+
+def encode_image_variants(source: str, stem: str, cache_directory: str) -> list:
+    """Writes resized WebP, AVIF (when supported) and PNG/JPEG copies of an image.
+
+    PNG/JPEG copies that come out larger than the source are dropped, except at
+    full width, where the source itself is kept as the fallback.
+    """
+    formats = [("webp", "WEBP")]
+    if features.check("avif"):
+        formats.append(("avif", "AVIF"))
+    fallback = "png" if source.lower().endswith(".png") else "jpg"
+    formats.append((fallback, "PNG" if fallback == "png" else "JPEG"))
+    source_size = os.path.getsize(source)
+    variants = []
+    with Image.open(source) as image:
+        image.load()
+        widths = sorted({width for width in IMAGE_WIDTHS if width < image.width})
+        for width in [*widths, image.width]:
+            height = round(image.height * width / image.width)
+            resized = (
+                image
+                if width == image.width
+                else image.resize((width, height), Image.Resampling.LANCZOS)
+            )
+            for extension, format_name in formats:
+                file_name = f"{stem}-{width}w.{extension}"
+                frame = resized.convert("RGB") if format_name == "JPEG" else resized
+                temporary_path = os.path.join(
+                    cache_directory, f"{file_name}.{os.getpid()}.tmp"
+                )
+                frame.save(
+                    temporary_path, format_name, **IMAGE_ENCODER_OPTIONS[extension]
+                )
+                if (
+                    extension == fallback
+                    and os.path.getsize(temporary_path) >= source_size
+                ):
+                    os.remove(temporary_path)
+                    if width != image.width:
+                        continue
+                    shutil.copy2(source, temporary_path)
+                os.replace(temporary_path, os.path.join(cache_directory, file_name))
+                variants.append(
+                    {
+                        "file": file_name,
+                        "width": width,
+                        "type": IMAGE_MIME_TYPES[extension],
+                    }
+                )
+    return variants
+
+
+def process_images(output_directory: str, context: "BuildContext") -> dict:
+    """Builds image variants once per source and encoder settings.
+
+    Only the full-width variant is staged into assets/. Without Pillow the
+    original file is the only variant.
+    """
+    images = {}
+    cache_directory = os.path.join(context.cache_directory, "images")
+    os.makedirs(cache_directory, exist_ok=True)
+    os.makedirs(os.path.join(output_directory, ASSET_DIRECTORY), exist_ok=True)
+    for source in get_image_sources():
+        name, extension = os.path.splitext(os.path.basename(source))
+        # The settings are part of the name, so changing the widths or options,
+        # or installing Pillow, re-encodes instead of reusing stale variants
+        variant_key = context.file_hash(source) + get_image_settings_key()
+        stem = f"{name}.{hashlib.sha256(variant_key.encode()).hexdigest()[:12]}"
+        index_path = os.path.join(cache_directory, f"{stem}.json")
+        variants = None
+        with contextlib.suppress(FileNotFoundError, json.JSONDecodeError):
+            variants = context.load_json(index_path)
+        if variants is None or any(
+            not os.path.exists(os.path.join(cache_directory, variant["file"]))
+            for variant in variants
+        ):
+            if Image is None:
+                file_name = f"{stem}{extension.lower()}"
+                shutil.copy2(source, os.path.join(cache_directory, file_name))
+                variants = [
+                    {
+                        "file": file_name,
+                        "width": None,
+                        "type": IMAGE_MIME_TYPES[extension.lower().lstrip(".")],
+                    }
+                ]
+            else:
+                with context.profiler.measure("encode images"):
+                    variants = encode_image_variants(source, stem, cache_directory)
+            write_json_atomically(index_path, variants, separators=(",", ":"))
+        # No page shows images, so only the full-width og:image variant is deployed
+        stage_file(
+            os.path.join(cache_directory, variants[-1]["file"]),
+            os.path.join(output_directory, ASSET_DIRECTORY, variants[-1]["file"]),
+        )
+        images[source] = variants
+    return images
+
+
+def prune_assets(output_directory: str, minify: bool, keep: set = frozenset()) -> None:
+    """Removes bundles and images left behind by earlier builds."""
+    current = {get_asset_file(name, minify)[0] for name in STATIC_ASSETS} | keep
+    for asset_path in glob.glob(os.path.join(output_directory, ASSET_DIRECTORY, "*")):
+        if os.path.basename(asset_path) not in current:
+            os.remove(asset_path)
 
-    log_files = sorted(glob.glob("logs/**/*.json", recursive=True), reverse=True)
-    if days:
-        log_files = log_files[:days]
 
+PRECACHE_RECENT_DAYS = 31
+SERVICE_WORKER_FILE = "service-worker.js"
+SERVICE_WORKER_SCRIPT = """\
+const PRECACHE = __PRECACHE__;
+const PRECACHE_NAME = 'dfl-precache';
+const RUNTIME_NAME = 'dfl-runtime';
+const scope = new URL(self.registration.scope);
+
+function revisionUrl(path) {
+    return new URL(path + '?revision=' + PRECACHE[path], scope).href;
+}
+
+function precachedPath(url) {
+    if (url.origin !== scope.origin || !url.pathname.startsWith(scope.pathname)) {
+        return null;
+    }
+    const path = url.pathname.slice(scope.pathname.length) || 'index.html';
+    return Object.hasOwn(PRECACHE, path) ? path : null;
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE_NAME);
+        const cached = new Set((await cache.keys()).map(request => request.url));
+        await Promise.all(Object.keys(PRECACHE)
+            .filter(path => !cached.has(revisionUrl(path)))
+            .map(async path => {
+                const response = await fetch(new URL(path, scope), { cache: 'no-cache' });
+                if (!response.ok) {
+                    throw new Error(`Failed to precache ${path}: ${response.status}`);
+                }
+                await cache.put(revisionUrl(path), response);
+            }));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE_NAME);
+        const current = new Set(Object.keys(PRECACHE).map(revisionUrl));
+        await Promise.all((await cache.keys())
+            .filter(request => !current.has(request.url))
+            .map(request => cache.delete(request)));
+        await self.clients.claim();
+    })());
+});
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== scope.origin) {
+        return;
+    }
+    const path = precachedPath(url);
+    if (path) {
+        event.respondWith(caches.match(revisionUrl(path), { cacheName: PRECACHE_NAME })
+            .then(response => response || fetch(event.request)));
+        return;
+    }
+    event.respondWith((async () => {
+        const cache = await caches.open(RUNTIME_NAME);
+        try {
+            const response = await fetch(event.request);
+            if (response.ok) {
+                await cache.put(event.request, response.clone());
+            }
+            return response;
+        } catch (error) {
+            const response = await cache.match(event.request);
+            if (response) {
+                return response;
+            }
+            throw error;
+        }
+    })());
+});
+"""
+
+
+def write_service_worker(output_directory: str, log_files: list, minify: bool) -> int:
+    """Writes a service worker that precaches the build outputs by content hash.
+
+    Returning visitors only download files whose hash changed since their last
+    visit; older day pages and log data are cached as they are opened.
+    """
+    precache_paths = [
+        get_dashboard_output_path(output_directory=output_directory),
+        os.path.join(output_directory, "history.html"),
+        os.path.join(output_directory, "food_database.html"),
+        # Only the CSS/JS bundles: the image variants are not shown on any page
+        *(
+            os.path.join(
+                output_directory, ASSET_DIRECTORY, get_asset_file(name, minify)[0]
+            )
+            for name in sorted(STATIC_ASSETS)
+        ),
+        *(
+            get_history_month_path(month, output_directory, create_dirs=False)
+            for month in group_logs_by_month(log_files)
+        ),
+        *(
+            get_dashboard_output_path(os.path.basename(log_file)[:10], output_directory)
+            for log_file in log_files[:PRECACHE_RECENT_DAYS]
+        ),
+    ]
+    precache = {}
+    for path in precache_paths:
+        if os.path.isfile(path):
+            url = os.path.relpath(path, output_directory).replace(os.sep, "/")
+            precache[url] = hash_file(path)[:16]
+    script = SERVICE_WORKER_SCRIPT
+    if minify:
+        script = minify_markup(script).replace(
+            "__PRECACHE__", json.dumps(precache, separators=(",", ":"))
+        )
+    else:
+        script = script.replace("__PRECACHE__", json.dumps(precache, indent=4))
+    write_text_atomically(os.path.join(output_directory, SERVICE_WORKER_FILE), script)
+    return len(precache)
+
+
+def build_site(
+    output_directory: str,
+    days: int,
+    incremental: bool,
+    jobs: int,
+    context: BuildContext,
+    since: str = None,
+    until: str = None,
+) -> None:
+    if output_directory != ".":
+        with context.profiler.measure("stage assets") as record:
+            staged = stage_assets(
+                output_directory,
+                jobs,
+                context.minify,
+                context.log_catalog.paths(),
+            )
+            record["bytes"] += staged["bytes"]
+        click.echo(
+            f"Assets: copied {staged['copied']}, linked {staged['linked']}, "
+            f"skipped {staged['skipped']}, removed {staged['removed']}"
+        )
+
+    # The variants only feed the og:image link preview, which needs --site-url
+    if context.site_url:
+        with context.profiler.measure("process images"):
+            context.images = process_images(output_directory, context)
+
+    manifest = BuildManifest(output_directory)
+    goals_path = context.data_path("goals.json")
+    inventory_path = context.data_path("inventory.json")
+    database_path = context.data_path("food_database.json")
+
+    log_files = context.log_catalog.select(days, since, until)
+
+    today = get_today()
+    latest_date = os.path.basename(log_files[0])[:10] if log_files else today
+    if days or since or until:
+        # Refresh the aggregates only over the selection and the trend windows;
+        # older days keep their stored totals until an unbounded build
+        window_starts = [
+            (
+                datetime.date.fromisoformat(end_date)
+                - datetime.timedelta(days=TREND_WINDOW_DAYS - 1)
+            ).isoformat()
+            for end_date in (today, latest_date)
+        ]
+        if log_files:
+            window_starts.append(os.path.basename(log_files[-1])[:10])
+        context.aggregate_since = min(window_starts)
+    pages = [
+        (
+            get_dashboard_output_path(output_directory=output_directory),
+            context.page_inputs(
+                goals_path,
+                inventory_path,
+                database_path,
+                get_log_path("logs", today),
+                date=today,
+                trends=context.trends(today),
+                images=context.images,
+                site_url=context.site_url,
+            ),
+            ("dashboard", {"output_directory": output_directory}),
+            None,
+        ),
+        (
+            os.path.join(output_directory, "food_database.html"),
+            context.page_inputs(database_path),
+            ("database", {"output_directory": output_directory}),
+            None,
+        ),
+        (
+            os.path.join(output_directory, "history.html"),
+            context.page_inputs(
+                goals_path,
+                *log_files,
+                trends=context.trends(latest_date),
+            ),
+            (
+                "history",
+                {
+                    "output_directory": output_directory,
+                    "limit": days,
+                    "since": since,
+                    "until": until,
+                    "include_months": False,
+                },
+            ),
+            None,
+        ),
+    ]
+    for month, month_logs in group_logs_by_month(log_files).items():
+        pages.append(
+            (
+                get_history_month_path(month, output_directory),
+                context.page_inputs(goals_path, database_path, *month_logs),
+                (
+                    "history_month",
+                    {
+                        "month": month,
+                        "log_files": month_logs,
+                        "output_directory": output_directory,
+                    },
+                ),
+                os.path.dirname(month_logs[0]),
+            )
+        )
     for log_file in log_files:
-        run_dashboard_generation(
-            os.path.basename(log_file).replace(".json", ""),
-            output_directory=output_directory,
+        date_str = os.path.basename(log_file).replace(".json", "")
+        pages.append(
+            (
+                get_dashboard_output_path(date_str, output_directory),
+                context.page_inputs(
+                    goals_path, inventory_path, database_path, log_file
+                ),
+                (
+                    "dashboard",
+                    {"date_str": date_str, "output_directory": output_directory},
+                ),
+                log_file,
+            )
+        )
+
+    pages = [
+        page for page in pages if manifest.needs_build(page[0], page[1], incremental)
+    ]
+    # Read every log the pages need in one concurrent pass; workers inherit them
+    needed_logs = {}
+    for _, _, (renderer, args), _ in pages:
+        if renderer == "history_month":
+            needed_logs.update(dict.fromkeys(args["log_files"]))
+        elif renderer == "dashboard" and args.get("date_str"):
+            needed_logs[get_log_path("logs", args["date_str"])] = None
+    for _ in context.load_logs(needed_logs):
+        pass
+    render_pages([(page[0], *page[2]) for page in pages], context, jobs=jobs)
+    for out_path, inputs, _, source in pages:
+        manifest.record(out_path, inputs, source=source)
+    with context.profiler.measure("write manifest"):
+        manifest.prune()
+        manifest.save()
+    prune_assets(
+        output_directory,
+        context.minify,
+        keep={variants[-1]["file"] for variants in context.images.values()},
+    )
+    with context.profiler.measure("write service worker"):
+        precached = write_service_worker(output_directory, log_files, context.minify)
+    click.echo(f"Service worker: precaching {precached} files")
+    echo_build_warnings(context)
+    click.echo(manifest.summary())
+    click.echo(context.summary())
+
+
+def parse_amount(amount) -> float:
+    """Returns the serving count of an entry, or None for measures like "1 cup"."""
+    if isinstance(amount, (int, float)):
+        return amount
+    # Strings such as "12 fl oz" or "1/2 bag" are measures, not serving counts
+    with contextlib.suppress(ValueError):
+        return float(amount)
+    return None
+
+
+def compute_log_totals(entries: list) -> dict:
+    return {
+        field: round(sum(entry.get(field, 0) for entry in entries), 2)
+        for field in NUTRITION_FIELDS
+    }
+
+
+def find_entry_mismatches(
+    entries: list, food_index: FoodIndex, tolerance: float
+) -> list:
+    mismatches = []
+    for entry in entries:
+        database_entry = food_index.resolve(entry.get("id"))
+        amount = parse_amount(entry.get("amount", 1))
+        # Modified entries intentionally deviate from the database values
+        if (
+            not database_entry
+            or amount is None
+            or "(Modified)" in entry.get("display_name", "")
+        ):
+            continue
+        for field in NUTRITION_FIELDS:
+            expected = round(database_entry.get(field, 0) * amount, 2)
+            if abs(entry.get(field, 0) - expected) > tolerance:
+                mismatches.append(
+                    (entry.get("id"), field, entry.get(field, 0), expected)
+                )
+    return mismatches
+
+
+def read_log_file(path: str) -> tuple:
+    with open(path, "rb") as log_file:
+        raw = log_file.read()
+    return path, hashlib.sha256(raw).hexdigest(), raw
+
+
+@cli.command()
+@click.option("--fix", is_flag=True, help="Rewrite drifted totals from the entries")
+@click.option(
+    "--check-database",
+    is_flag=True,
+    help="Also compare each entry with food_database.json scaled by its amount",
+)
+@click.option(
+    "--tolerance",
+    default=0.5,
+    show_default=True,
+    help="Allowed difference when comparing entries with the database",
+)
+@click.option(
+    "--jobs",
+    default=8,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of threads used to read log files",
+)
+@click.option("--no-cache", is_flag=True, help="Re-check logs verified before")
+def verify(
+    fix: bool, check_database: bool, tolerance: float, jobs: int, no_cache: bool
+):
+    """Recomputes log totals from their entries and reports drift."""
+    context = BuildContext()
+    cache_path = os.path.join(context.cache_directory, "verified_logs.json")
+    verified = {}
+    if not no_cache:
+        with contextlib.suppress(FileNotFoundError, json.JSONDecodeError):
+            verified = context.load_json(cache_path)
+    food_index, database_hash = None, None
+    if check_database:
+        food_index = context.food_index
+        database_hash = context.file_hash(context.data_path("food_database.json"))
+
+    checked = skipped = drifted = fixed = mismatched = 0
+    still_verified = {}
+    # Like the aggregates, trust an unchanged size and mtime before reading
+    signatures = {}
+    for log_path in LogCatalog().paths():
+        stat = os.stat(log_path)
+        signatures[log_path] = [stat.st_size, stat.st_mtime_ns]
+        record = verified.get(log_path)
+        if (
+            record
+            and record.get("signature") == signatures[log_path]
+            and (not check_database or record["database"] == database_hash)
+        ):
+            still_verified[log_path] = record
+            skipped += 1
+    unread = [log_path for log_path in signatures if log_path not in still_verified]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for log_path, file_hash, raw in executor.map(read_log_file, unread):
+            record = verified.get(log_path)
+            if (
+                record
+                and record["hash"] == file_hash
+                and (not check_database or record["database"] == database_hash)
+            ):
+                # Touched but unchanged, so only the signature is refreshed
+                still_verified[log_path] = dict(record, signature=signatures[log_path])
+                skipped += 1
+                continue
+            checked += 1
+            data = json.loads(raw)
+            entries = data.get("entries", [])
+            totals = data.get("totals", {})
+            expected = compute_log_totals(entries)
+            drift = {
+                field: (totals.get(field, 0), expected[field])
+                for field in NUTRITION_FIELDS
+                if abs(totals.get(field, 0) - expected[field]) > 0.01
+            }
+            mismatches = (
+                find_entry_mismatches(entries, food_index, tolerance)
+                if check_database
+                else []
+            )
+            for field, (stored, computed) in drift.items():
+                click.echo(
+                    f"Drift: {log_path} {field} totals {stored} != entries {computed}"
+                )
+            for food_id, field, logged, computed in mismatches:
+                click.echo(
+                    f"Mismatch: {log_path} {food_id} {field} {logged} "
+                    f"!= database x amount {computed}"
+                )
+            mismatched += len(mismatches)
+            if drift:
+                drifted += 1
+                if not fix:
+                    continue
+                data["totals"] = dict(totals, **expected)
+                write_json_atomically(log_path, data, indent=2, ensure_ascii=False)
+                click.echo(f"Fixed: {log_path}")
+                fixed += 1
+                file_hash = context.file_hash(log_path)
+                stat = os.stat(log_path)
+                signatures[log_path] = [stat.st_size, stat.st_mtime_ns]
+            if not mismatches:
+                still_verified[log_path] = {
+                    "hash": file_hash,
+                    "signature": signatures[log_path],
+                    "database": database_hash if check_database else None,
+                }
+
+    write_json_atomically(cache_path, still_verified, separators=(",", ":"))
+    if check_database:
+        echo_build_warnings(context)
+    click.echo(
+        f"Verified {checked} logs ({skipped} unchanged since the last run): "
+        f"{drifted} with drifted totals, {fixed} fixed, {mismatched} entry mismatches"
+    )
+    if drifted > fixed or mismatched:
+        raise click.exceptions.Exit(1)
+
+
+def scale_quantity(value: float, amount: float) -> float:
+    """Rounds to two decimals and keeps whole numbers as integers, like the logs."""
+    scaled = round(value * amount, 2)
+    return int(scaled) if float(scaled).is_integer() else scaled
+
+
+@cli.command()
+@click.option("--id", "food_id", required=True, help="Food id, alias or id fragment")
+@click.option(
+    "--amount",
+    default=1.0,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Servings, scales the macros",
+)
+@click.option("--date", type=ISO_DATE, help="YYYY-MM-DD, defaults to today")
+@click.option("--keep-inventory", is_flag=True, help="Do not decrement inventory.json")
+@click.option("--output-directory", default=".", help="Output directory")
+def add(
+    food_id: str,
+    amount: float,
+    date: str,
+    keep_inventory: bool,
+    output_directory: str,
+):
+    """Appends a food to a day's log and re-renders that day and the dashboard."""
+    context = BuildContext()
+    database_id = context.food_index.resolve_id(food_id)
+    if database_id is None:
+        raise click.ClickException(f"Unknown food id '{food_id}'")
+    if food_id in context.food_index.ambiguous:
+        candidates = context.food_index.ambiguous[food_id]
+        raise click.ClickException(
+            f"Ambiguous food id '{food_id}' matches {', '.join(candidates)}"
+        )
+    echo_build_warnings(context)
+    food = context.database[database_id]
+
+    date_str = date or get_today()
+    log_path = get_log_path("logs", date_str, create_dirs=True)
+    daily_log = (
+        context.load_json(log_path)
+        if os.path.exists(log_path)
+        else {"entries": [], "totals": dict.fromkeys(NUTRITION_FIELDS, 0)}
+    )
+    display_name = f"{food.get('brand', '')} - {food.get('product_name', '')}"
+    if food.get("flavor"):
+        display_name += f" ({food['flavor']})"
+    entry = {
+        "id": database_id,
+        "display_name": display_name,
+        "amount": scale_quantity(amount, 1),
+        **{
+            field: scale_quantity(food.get(field, 0), amount)
+            for field in NUTRITION_FIELDS
+        },
+    }
+    daily_log["entries"].append(entry)
+    totals = daily_log.setdefault("totals", {})
+    for field in NUTRITION_FIELDS:
+        totals[field] = scale_quantity(totals.get(field, 0) + entry[field], 1)
+    write_json_atomically(log_path, daily_log, indent=2, ensure_ascii=False)
+    click.echo(
+        f"Logged: {display_name} x{entry['amount']} on {date_str} "
+        f"({entry['calories_kcal']} kcal, {entry['protein_g']}g protein)"
+    )
+
+    if not keep_inventory:
+        inventory = context.inventory
+        for item in inventory:
+            if context.food_index.resolve_id(item["id"]) == database_id:
+                item["quantity"] = scale_quantity(
+                    max(0, item.get("quantity", 0) - amount), 1
+                )
+                write_json_atomically(
+                    context.data_path("inventory.json"),
+                    inventory,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+                click.echo(f"Inventory: {database_id} now {item['quantity']}")
+                break
+
+    context.invalidate(log_path)
+    context.invalidate(context.data_path("inventory.json"))
+    run_dashboard_generation(date_str, output_directory, context)
+    run_dashboard_generation(output_directory=output_directory, context=context)
+
+
+@cli.command()
+@click.option("--date", type=ISO_DATE, help="YYYY-MM-DD, defaults to today")
+@click.option(
+    "--count",
+    default=PLAN_COUNT,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of plans to suggest",
+)
+@click.option(
+    "--max-servings",
+    default=PLAN_MAX_SERVINGS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Most servings of one food in a plan",
+)
+def plan(date: str, count: int, max_servings: int):
+    """Suggests inventory combinations with the most protein for the calories left."""
+    context = BuildContext()
+    try:
+        goals = context.goals
+        inventory = context.inventory
+        food_index = context.food_index
+    except FileNotFoundError as error:
+        raise click.ClickException(f"Missing data file - {error}")
+
+    date_str = date or get_today()
+    log_path = get_log_path("logs", date_str)
+    totals = (
+        context.load_log(log_path)["totals"]
+        if os.path.exists(log_path)
+        else dict.fromkeys(NUTRITION_FIELDS, 0)
+    )
+    with context.profiler.measure("solve meal plans") as record:
+        meal_plans = solve_meal_plans(
+            totals, goals, inventory, food_index, count, max_servings
+        )
+    echo_build_warnings(context)
+    click.echo(
+        f"Budget: {meal_plans['budget']} kcal left of {goals.get('calories_target', 0)} "
+        f"on {date_str} ({goals.get('phase', 'cut')}), "
+        f"solved in {record['seconds'] * 1000:.1f} ms"
+    )
+    if not meal_plans["plans"]:
+        click.echo("No inventory combination fits the remaining calories.")
+    for number, meal_plan in enumerate(meal_plans["plans"], start=1):
+        click.echo(
+            f"Plan {number}: {meal_plan['calories_kcal']} kcal, "
+            f"{meal_plan['protein_g']}g protein, "
+            f"{meal_plan['carbohydrate_g']}g carbohydrate, {meal_plan['fat_g']}g fat"
+        )
+        for item in meal_plan["items"]:
+            click.echo(
+                f"  {item['servings']} x {item['id']} "
+                f"({get_food_label(food_index.database[item['id']])})"
+            )
+
+
+SQLITE_SCHEMA_VERSION = 1
+SQLITE_SCHEMA = """
+CREATE TABLE sources (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER);
+CREATE TABLE foods (
+    id TEXT PRIMARY KEY,
+    brand TEXT,
+    product_name TEXT,
+    flavor TEXT,
+    calories_kcal REAL,
+    protein_g REAL,
+    carbohydrate_g REAL,
+    fat_g REAL
+);
+CREATE INDEX foods_brand ON foods (brand);
+CREATE TABLE inventory (id TEXT, quantity REAL, unit TEXT);
+CREATE INDEX inventory_id ON inventory (id);
+CREATE TABLE log_entries (
+    date TEXT,
+    position INTEGER,
+    id TEXT,
+    display_name TEXT,
+    amount,
+    calories_kcal REAL,
+    protein_g REAL,
+    carbohydrate_g REAL,
+    fat_g REAL,
+    PRIMARY KEY (date, position)
+);
+CREATE INDEX log_entries_id ON log_entries (id);
+CREATE TABLE daily_totals (
+    date TEXT PRIMARY KEY,
+    calories_kcal REAL,
+    protein_g REAL,
+    carbohydrate_g REAL,
+    fat_g REAL
+);
+"""
+QUERY_PRESETS = {
+    "days-with": (
+        "SELECT date, display_name, amount, calories_kcal, protein_g"
+        " FROM log_entries WHERE id = :food OR display_name LIKE :pattern"
+        " ORDER BY date"
+    ),
+    "protein-per-calorie": (
+        "SELECT id, brand, product_name, protein_g, calories_kcal,"
+        " round(protein_g / calories_kcal, 3) AS protein_per_kcal"
+        " FROM foods WHERE calories_kcal > 0"
+        " ORDER BY protein_per_kcal DESC, protein_g DESC LIMIT :limit"
+    ),
+    "most-eaten": (
+        "SELECT id, count(DISTINCT date) AS days, round(sum(protein_g), 1) AS protein_g"
+        " FROM log_entries GROUP BY id ORDER BY days DESC, id LIMIT :limit"
+    ),
+}
+
+
+class SQLiteMirror:
+    """An indexed SQLite copy of the data files and logs, kept in sync per file.
+
+    The JSON files stay the source of truth. Each source's size and mtime are
+    recorded, so a sync only re-imports the files that changed and drops the
+    rows of files that were deleted.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version != SQLITE_SCHEMA_VERSION:
+            self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self.connection:
+            for (table,) in self.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall():
+                self.connection.execute(f"DROP TABLE {table}")
+            self.connection.executescript(SQLITE_SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _import_foods(self, data: dict) -> None:
+        self.connection.execute("DELETE FROM foods")
+        self.connection.executemany(
+            "INSERT INTO foods VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    food_id,
+                    food.get("brand"),
+                    food.get("product_name"),
+                    food.get("flavor"),
+                    *(food.get(field, 0) for field in NUTRITION_FIELDS),
+                )
+                for food_id, food in data.items()
+            ),
+        )
+
+    def _import_inventory(self, data: list) -> None:
+        self.connection.execute("DELETE FROM inventory")
+        self.connection.executemany(
+            "INSERT INTO inventory VALUES (?, ?, ?)",
+            ((item["id"], item.get("quantity", 0), item.get("unit")) for item in data),
+        )
+
+    def _delete_log(self, date_str: str) -> None:
+        self.connection.execute("DELETE FROM log_entries WHERE date = ?", (date_str,))
+        self.connection.execute("DELETE FROM daily_totals WHERE date = ?", (date_str,))
+
+    def _import_log(self, date_str: str, data: dict) -> None:
+        self._delete_log(date_str)
+        self.connection.executemany(
+            "INSERT INTO log_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    date_str,
+                    position,
+                    entry.get("id"),
+                    entry.get("display_name"),
+                    entry.get("amount"),
+                    *(entry.get(field, 0) for field in NUTRITION_FIELDS),
+                )
+                for position, entry in enumerate(data.get("entries", []))
+            ),
         )
+        totals = data.get("totals", {})
+        self.connection.execute(
+            "INSERT INTO daily_totals VALUES (?, ?, ?, ?, ?)",
+            (date_str, *(totals.get(field, 0) for field in NUTRITION_FIELDS)),
+        )
+
+    def sync(self, context: "BuildContext") -> int:
+        """Re-imports changed sources, drops deleted logs, and returns how many changed."""
+        importers = {
+            context.data_path("food_database.json"): self._import_foods,
+            context.data_path("inventory.json"): self._import_inventory,
+        }
+        sources = [path for path in importers if os.path.exists(path)]
+        sources += context.log_catalog.paths()
+        known = {
+            row["path"]: (row["size"], row["mtime_ns"])
+            for row in self.connection.execute("SELECT * FROM sources")
+        }
+        changed = 0
+        with self.connection:
+            for path in sources:
+                stat = os.stat(path)
+                if known.pop(path, None) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                data = context.load_json(path)
+                if path in importers:
+                    importers[path](data)
+                else:
+                    self._import_log(os.path.basename(path)[:10], data)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns),
+                )
+                changed += 1
+            for path in known:
+                if path not in importers:
+                    self._delete_log(os.path.basename(path)[:10])
+                self.connection.execute("DELETE FROM sources WHERE path = ?", (path,))
+                changed += 1
+        return changed
+
+    def query(self, sql: str, parameters: dict = None) -> tuple:
+        """Runs a read-only query and returns the column names and rows."""
+        self.connection.execute("PRAGMA query_only = ON")
+        try:
+            cursor = self.connection.execute(sql, parameters or {})
+            columns = [description[0] for description in cursor.description or ()]
+            return columns, cursor.fetchall()
+        finally:
+            self.connection.execute("PRAGMA query_only = OFF")
+
+
+@cli.command()
+@click.argument("sql", required=False)
+@click.option(
+    "--preset",
+    type=click.Choice(sorted(QUERY_PRESETS)),
+    help="Run a saved query instead of SQL",
+)
+@click.option("--food", help="Food id or name fragment for --preset days-with")
+@click.option("--limit", default=20, show_default=True, help="Row limit for presets")
+def query(sql: str, preset: str, food: str, limit: int):
+    """Syncs the SQLite mirror in .cache/ and runs a read-only query against it.
+
+    Tables: foods, inventory, log_entries and daily_totals.
+    """
+    if bool(sql) == bool(preset):
+        raise click.UsageError("Pass either an SQL query or --preset.")
+    if preset == "days-with" and not food:
+        raise click.UsageError("--preset days-with needs --food.")
+    context = BuildContext()
+    mirror = SQLiteMirror(os.path.join(context.cache_directory, SQLITE_NAME))
+    try:
+        changed = mirror.sync(context)
+        if changed:
+            click.echo(f"Synced {changed} changed files into {mirror.path}", err=True)
+        parameters = {"food": food, "pattern": f"%{food}%", "limit": limit}
+        try:
+            columns, rows = mirror.query(sql or QUERY_PRESETS[preset], parameters)
+        except sqlite3.Error as error:
+            raise click.ClickException(f"Query failed - {error}")
+    finally:
+        mirror.close()
+    if columns:
+        click.echo("\t".join(columns))
+    for row in rows:
+        click.echo("\t".join("" if value is None else str(value) for value in row))
+
+
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource('/__reload').onmessage = () => location.reload();"
+    "</script>"
+)
+
+
+class ReloadBroadcaster:
+    """Wakes every open /__reload stream when the site has been rebuilt."""
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._condition = threading.Condition()
+
+    def notify(self) -> None:
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, seen_version: int, timeout: float = 15.0) -> int:
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != seen_version, timeout)
+            return self.version
+
+
+def make_dev_request_handler(output_directory: str, broadcaster: ReloadBroadcaster):
+    class DevRequestHandler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, directory=output_directory, **kwargs)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path == "/__reload":
+                self.stream_reload_events()
+                return
+            path = self.translate_path(self.path)
+            if os.path.isdir(path):
+                path = os.path.join(path, "index.html")
+            if not path.endswith(".html") or not os.path.isfile(path):
+                super().do_GET()
+                return
+            with open(path, "rb") as page_file:
+                page = page_file.read()
+            page = page.replace(b"</body>", LIVE_RELOAD_SCRIPT.encode() + b"</body>", 1)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(page)
+
+        def stream_reload_events(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            seen_version = broadcaster.version
+            try:
+                while True:
+                    version = broadcaster.wait(seen_version)
+                    if version != seen_version:
+                        message = b"data: reload\n\n"
+                    else:
+                        message = b": ping\n\n"
+                    seen_version = version
+                    self.wfile.write(message)
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+    return DevRequestHandler
+
+
+def snapshot_sources() -> dict:
+    snapshot = {}
+    for path in glob.glob("data/*.json") + glob.glob("logs/**/*.json", recursive=True):
+        with contextlib.suppress(FileNotFoundError):
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+@cli.command()
+@click.option("--output-directory", default=".", help="Output directory")
+@click.option(
+    "--days", default=None, type=int, help="Limit generation to the last N days"
+)
+@click.option("--host", default="127.0.0.1", show_default=True, help="Bind address")
+@click.option("--port", default=8000, show_default=True, help="Port to serve on")
+@click.option(
+    "--interval",
+    default=0.5,
+    show_default=True,
+    help="Seconds between checks of data/ and logs/ for changes",
+)
+def serve(output_directory: str, days: int, host: str, port: int, interval: float):
+    """Serves the site, rebuilding affected pages whenever a source file changes."""
+    context = BuildContext()
+    os.makedirs(output_directory, exist_ok=True)
+    build_site(output_directory, days, True, 1, context)
+    broadcaster = ReloadBroadcaster()
+    server = http.server.ThreadingHTTPServer(
+        (host, port), make_dev_request_handler(output_directory, broadcaster)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    click.echo(f"Serving {output_directory} at http://{host}:{port}/ (Ctrl+C to stop)")
+
+    sources = snapshot_sources()
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot_sources()
+            changed = sorted(
+                path
+                for path in set(sources) | set(current)
+                if sources.get(path) != current.get(path)
+            )
+            sources = current
+            if not changed:
+                continue
+            click.echo(f"Changed: {', '.join(changed)}")
+            start = time.perf_counter()
+            for path in changed:
+                context.invalidate(path)
+            context.reset_counters()
+            try:
+                build_site(output_directory, days, True, 1, context)
+            except (OSError, ValueError, KeyError) as error:
+                click.echo(f"Error: rebuild failed - {error}", err=True)
+                continue
+            click.echo(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+            broadcaster.notify()
+    except KeyboardInterrupt:
+        server.shutdown()
 
 
 if __name__ == "__main__":